@@ -11,7 +11,7 @@ from multiprocessing import cpu_count
 
 # Import from lib
 from lib.core import apply_gradient_map
-from lib.files import get_image_files
+from lib.files import get_image_files, optimize_pngs
 from lib.batch import BatchProcessor, ProcessingTask
 
 
@@ -112,12 +112,18 @@ def process_images(input_arg, gradient_arg, args):
         """Print progress messages"""
         print(message)
 
-    processor = BatchProcessor(max_workers=args.workers)
-    successful_count, failed_count, error_messages = processor.process_batch(
-        tasks,
-        progress_callback=progress_callback,
-        use_parallel=(args.workers > 1)
-    )
+    with BatchProcessor(max_workers=args.workers) as processor:
+        successful_count, failed_count, error_messages = processor.process_batch(
+            tasks,
+            progress_callback=progress_callback,
+            use_parallel=(args.workers > 1)
+        )
+
+    if args.optimize_pngs and args.format == "png" and successful_count:
+        print("\nOptimizing PNG files with oxipng...")
+        written = [task.output_path for task in tasks if task.output_path.exists()]
+        if not optimize_pngs(written):
+            print("Warning: oxipng is not installed or failed; PNGs left as written")
 
     print(f"\nProcessing complete!")
     print(f"✓ Success: {successful_count}")
@@ -177,6 +183,11 @@ Examples:
         action="store_true",
         help="Disable parallel processing (same as -w 1)",
     )
+    parser.add_argument(
+        "--optimize-pngs",
+        action="store_true",
+        help="Recompress PNG output with oxipng after processing (must be installed)",
+    )
 
     args = parser.parse_args()
 
@@ -1,11 +1,33 @@
 """Batch processing coordinator for gradient mapping"""
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from multiprocessing import cpu_count
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import cpu_count, shared_memory
 from pathlib import Path
-from typing import Callable, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Callable, Iterator, List, Tuple, Optional
+from dataclasses import dataclass, field
 
-from .core import apply_gradient_map
+import numpy as np
+
+from .core import (
+    apply_gradient_map,
+    apply_gradient_maps_batch,
+    apply_gradient_maps_to_planes,
+    build_gradient_luts,
+    clear_base_image_cache,
+    decode_base_image,
+    preload_gradient_luts,
+)
+
+
+# Batches whose base images add up to less than this many (compressed)
+# bytes finish faster in-process than it takes to start a worker pool
+SMALL_BATCH_BYTES = 1024 * 1024
+
+# Seconds between cancel checks while waiting on pool workers
+CANCEL_POLL_INTERVAL = 0.1
 
 
 @dataclass
@@ -18,8 +40,178 @@ class ProcessingTask:
     output_format: str = "PNG"
 
 
+@dataclass
+class ProcessingGroup:
+    """All gradient mapping tasks that share one base image"""
+    base_image_path: Path
+    tasks: List[ProcessingTask] = field(default_factory=list)
+
+
+@dataclass
+class SharedPlanes:
+    """Handle to a base image's luminance and alpha planes in shared memory"""
+    shm_name: str
+    shape: Tuple[int, int]
+    base_image_path: Path
+    has_alpha: bool = True
+
+
+def share_base_image(base_image_path: Path) -> Tuple[shared_memory.SharedMemory, SharedPlanes]:
+    """Decode a base image into a shared memory block
+
+    The block holds a (2, H, W) uint8 array of luminance then alpha, or
+    a (1, H, W) array of luminance only for opaque images. The caller
+    owns the block and must close() and unlink() it.
+
+    Args:
+        base_image_path: Path to base image file
+
+    Returns:
+        tuple: (SharedMemory block, SharedPlanes handle for workers)
+    """
+    lum, alpha = decode_base_image(base_image_path)
+    count = 1 if alpha is None else 2
+    shm = shared_memory.SharedMemory(create=True, size=count * lum.size)
+    planes = np.ndarray((count,) + lum.shape, dtype=np.uint8, buffer=shm.buf)
+    planes[0] = lum
+    if alpha is not None:
+        planes[1] = alpha
+    del planes
+    return shm, SharedPlanes(shm.name, lum.shape, base_image_path, alpha is not None)
+
+
+def _split(items: list, parts: int) -> List[list]:
+    """Split a list into at most `parts` contiguous, non-empty chunks"""
+    size = -(-len(items) // parts)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _gradient_specs(tasks: List[ProcessingTask]) -> list:
+    """Per-gradient arguments for the core batch functions"""
+    return [
+        (task.gradient_map_path, task.output_path, task.quality, task.output_format)
+        for task in tasks
+    ]
+
+
+def _luts_for(luts: dict, tasks: List[ProcessingTask]) -> dict:
+    """The LUTs of a batch that a list of tasks needs"""
+    names = {str(task.gradient_map_path) for task in tasks}
+    return {key: lut for key, lut in luts.items() if key[0] in names}
+
+
+def _pool_context():
+    """Multiprocessing context for the worker pool
+
+    Workers are started from a clean fork server where available: forking
+    a process whose native thread pools are already running (such as
+    Numba's TBB layer after a preview) can deadlock the children.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context()
+
+
+def _group_cost(group: "ProcessingGroup") -> int:
+    """Rough cost of a group: base image file size times its task count"""
+    try:
+        return Path(group.base_image_path).stat().st_size * len(group.tasks)
+    except OSError:
+        return 0
+
+
+def _is_small_batch(groups: List["ProcessingGroup"]) -> bool:
+    """Estimate from file sizes whether a batch is too small to parallelize"""
+    work = 0
+    for group in groups:
+        work += _group_cost(group)
+        if work >= SMALL_BATCH_BYTES:
+            return False
+    return True
+
+
+def _group_failure(group: "ProcessingGroup", error: Exception) -> List[Tuple[bool, str]]:
+    """Failure results for every task of a group whose base image failed"""
+    message = f"✗ Error processing {Path(group.base_image_path).name}: {error}"
+    return [(False, message)] * len(group.tasks)
+
+
+def prefetch_base_images(groups: List["ProcessingGroup"], depth: int = 2) -> Iterator[tuple]:
+    """Decode base images on a reader thread ahead of the consumer
+
+    Decoding (disk I/O plus PIL decode, which releases the GIL) overlaps
+    with the caller mapping and saving the previous image. At most `depth`
+    decoded images are buffered.
+
+    Args:
+        groups: ProcessingGroups to decode, in order
+        depth: Maximum number of decoded images waiting in the queue
+
+    Yields:
+        tuple: (group, (luminance, alpha) or None, exception or None)
+    """
+    decoded = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                decoded.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        for group in groups:
+            try:
+                item = (group, decode_base_image(group.base_image_path), None)
+            except Exception as e:
+                item = (group, None, e)
+            if not put(item):
+                return
+        put(None)
+
+    thread = threading.Thread(target=reader, name="base-image-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = decoded.get()
+            if item is None:
+                return
+            yield item
+    finally:
+        # Unblock the reader if the consumer stopped early
+        stop.set()
+
+
+def group_tasks(tasks: List[ProcessingTask]) -> List[ProcessingGroup]:
+    """Group tasks by base image, preserving first-seen order
+
+    Args:
+        tasks: List of ProcessingTask objects
+
+    Returns:
+        List of ProcessingGroup objects, one per distinct base image
+    """
+    groups = {}
+    for task in tasks:
+        key = str(task.base_image_path)
+        if key not in groups:
+            groups[key] = ProcessingGroup(base_image_path=task.base_image_path)
+        groups[key].tasks.append(task)
+    return list(groups.values())
+
+
 class BatchProcessor:
-    """Batch processing coordinator using ProcessPoolExecutor"""
+    """Batch processing coordinator using ProcessPoolExecutor
+
+    The worker pool is created on first parallel use and reused across
+    process_batch() calls. Call close(), or use the processor as a context
+    manager, to shut it down.
+    """
 
     def __init__(self, max_workers: Optional[int] = None):
         """Initialize batch processor
@@ -28,6 +220,42 @@ class BatchProcessor:
             max_workers: Number of worker processes (default: CPU count)
         """
         self.max_workers = max_workers or cpu_count()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool, if one was started"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Forget a broken worker pool and shut it down
+
+        Only clears the shared pool if it is still `executor`, so a pool
+        another batch has already replaced is left alone.
+        """
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Return the shared worker pool, starting it on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=_pool_context(),
+                )
+            return self._executor
 
     def process_single(self, task: ProcessingTask) -> Tuple[bool, str]:
         """Process a single task
@@ -55,6 +283,9 @@ class BatchProcessor:
     ) -> Tuple[int, int, List[str]]:
         """Process multiple tasks
 
+        Tasks sharing a base image are processed together so each base is
+        decoded only once. Groups with the largest base images start first.
+
         Args:
             tasks: List of ProcessingTask objects
             progress_callback: Optional callback function(current, total, message)
@@ -71,15 +302,19 @@ class BatchProcessor:
         if cancel_check and cancel_check():
             return successful_count, failed_count, error_messages
 
-        if not use_parallel or self.max_workers == 1:
-            # Sequential processing
-            for i, task in enumerate(tasks, 1):
-                if cancel_check and cancel_check():
-                    break
-                success, message = self.process_single(task)
+        # Keep tasks sharing a gradient adjacent so its cached LUT is reused
+        tasks = sorted(tasks, key=lambda t: str(t.gradient_map_path))
+        # Start the most expensive groups first so a large image does not
+        # end up running alone at the tail of the batch
+        groups = sorted(group_tasks(tasks), key=_group_cost, reverse=True)
+        completed = 0
 
+        def record(results):
+            nonlocal completed, successful_count, failed_count
+            for success, message in results:
+                completed += 1
                 if progress_callback:
-                    progress_callback(i, total, message)
+                    progress_callback(completed, total, message)
 
                 if success:
                     successful_count += 1
@@ -87,59 +322,164 @@ class BatchProcessor:
                     failed_count += 1
                     error_messages.append(message)
 
-        else:
-            # Parallel processing
-            executor = ProcessPoolExecutor(max_workers=self.max_workers)
-            futures = {
-                executor.submit(self._process_task_wrapper, task): task
-                for task in tasks
-            }
+        run_sequential = (
+            not use_parallel
+            or self.max_workers == 1
+            or len(tasks) <= 1
+            or _is_small_batch(groups)
+        )
 
-            completed = 0
-            cancelled = False
-            try:
-                for future in as_completed(futures):
+        try:
+            if run_sequential:
+                # In-process processing (also used when pool startup would
+                # cost more than the work itself), run as a thread pipeline:
+                # a reader thread decodes the next base image while this
+                # thread maps gradients and writer threads encode the results
+                encode_workers = self.max_workers if use_parallel else 1
+                for group, planes, error in prefetch_base_images(groups):
                     if cancel_check and cancel_check():
-                        cancelled = True
                         break
-                    completed += 1
-                    success, message = future.result()
+                    if error is not None:
+                        record(_group_failure(group, error))
+                        continue
+                    lum, alpha = planes
+                    record(apply_gradient_maps_to_planes(
+                        lum, alpha, _gradient_specs(group.tasks), group.base_image_path,
+                        encode_workers=encode_workers, cancel_check=cancel_check
+                    ))
 
-                    if progress_callback:
-                        progress_callback(completed, total, message)
+            else:
+                # Parallel processing
+                executor = self._get_executor()
+                # Gradient LUTs are built once here for the whole batch and
+                # sent along with the work that needs them, so workers of a
+                # long-lived pool never decode gradients themselves
+                luts = build_gradient_luts({t.gradient_map_path for t in tasks})
+                shared_blocks = []
+                futures = {}
+                # Tasks per group whose results have not been recorded yet,
+                # so they can be failed if the pool breaks
+                outstanding = {index: len(group.tasks) for index, group in enumerate(groups)}
 
-                    if success:
-                        successful_count += 1
+                def finish(index, results):
+                    record(results)
+                    outstanding[index] -= len(results)
+
+                try:
+                    if len(groups) >= self.max_workers and cancel_check is None:
+                        # Nothing to cancel: dispatch groups in chunks to cut
+                        # per-task IPC round-trips and Future bookkeeping
+                        chunksize = max(1, len(groups) // (self.max_workers * 4))
+                        for index, results in enumerate(executor.map(
+                            self._process_group_wrapper,
+                            groups,
+                            (_luts_for(luts, group.tasks) for group in groups),
+                            chunksize=chunksize
+                        )):
+                            finish(index, results)
+                    elif len(groups) >= self.max_workers:
+                        # Enough base images to keep every worker busy
+                        for index, group in enumerate(groups):
+                            future = executor.submit(
+                                self._process_group_wrapper, group, _luts_for(luts, group.tasks)
+                            )
+                            futures[future] = index
                     else:
-                        failed_count += 1
-                        error_messages.append(message)
-            finally:
-                if cancel_check and cancel_check():
-                    cancelled = True
-                if cancelled:
+                        # Too few base images: decode each once here, share the
+                        # planes and spread its gradients across the workers
+                        for index, group in enumerate(groups):
+                            try:
+                                shm, planes = share_base_image(group.base_image_path)
+                            except Exception as e:
+                                finish(index, _group_failure(group, e))
+                                continue
+                            shared_blocks.append(shm)
+                            for chunk in _split(group.tasks, self.max_workers):
+                                future = executor.submit(
+                                    self._process_shared_wrapper,
+                                    planes,
+                                    _gradient_specs(chunk),
+                                    _luts_for(luts, chunk)
+                                )
+                                futures[future] = index
+
+                    # Wake up periodically rather than blocking until the next
+                    # group finishes, so a cancel is noticed promptly
+                    not_done = set(futures)
+                    while not_done and not (cancel_check and cancel_check()):
+                        done, not_done = wait(
+                            not_done, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED
+                        )
+                        for future in done:
+                            finish(futures.pop(future), future.result())
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for running out of memory).
+                    # Drop the pool so the next batch starts a fresh one, keep
+                    # whatever finished, and fail the rest of this batch
+                    self._discard_executor(executor)
+                    for future in list(futures):
+                        if future.done() and not future.cancelled() and future.exception() is None:
+                            finish(futures.pop(future), future.result())
+                    error = RuntimeError("worker process died")
+                    for index, remaining in outstanding.items():
+                        if remaining:
+                            finish(index, _group_failure(groups[index], error)[:remaining])
+                finally:
+                    # Drop any work still queued; the pool itself stays up for
+                    # the next batch
                     for future in futures:
                         if not future.done():
                             future.cancel()
-                    executor.shutdown(wait=False, cancel_futures=True)
-                else:
-                    executor.shutdown()
+                    for shm in shared_blocks:
+                        shm.close()
+                        shm.unlink()
+        finally:
+            # Decodes done here (sequential path, shared planes) are not
+            # needed once the batch is over
+            clear_base_image_cache()
 
         return successful_count, failed_count, error_messages
 
     @staticmethod
-    def _process_task_wrapper(task: ProcessingTask) -> Tuple[bool, str]:
-        """Wrapper for processing task (needed for ProcessPoolExecutor)
+    def _process_group_wrapper(group: ProcessingGroup, luts: dict) -> List[Tuple[bool, str]]:
+        """Wrapper for processing a group (needed for ProcessPoolExecutor)
 
         Args:
-            task: ProcessingTask to execute
+            group: ProcessingGroup to execute
+            luts: Prebuilt LUTs of the group's gradients
 
         Returns:
-            tuple: (success: bool, message: str)
+            list: (success: bool, message: str) tuple per task
         """
-        return apply_gradient_map(
-            task.base_image_path,
-            task.gradient_map_path,
-            task.output_path,
-            task.quality,
-            task.output_format
-        )
+        preload_gradient_luts(luts)
+        return apply_gradient_maps_batch(group.base_image_path, _gradient_specs(group.tasks))
+
+    @staticmethod
+    def _process_shared_wrapper(
+        planes: SharedPlanes, gradient_specs: list, luts: dict
+    ) -> List[Tuple[bool, str]]:
+        """Apply gradients to a base image held in shared memory
+
+        Args:
+            planes: SharedPlanes handle created by share_base_image()
+            gradient_specs: List of (gradient_map_path, output_path, quality,
+                output_format) tuples
+            luts: Prebuilt LUTs of the specs' gradients
+
+        Returns:
+            list: (success: bool, message: str) tuple per gradient spec
+        """
+        preload_gradient_luts(luts)
+        shm = shared_memory.SharedMemory(name=planes.shm_name)
+        try:
+            count = 2 if planes.has_alpha else 1
+            arrays = np.ndarray((count,) + tuple(planes.shape), dtype=np.uint8, buffer=shm.buf)
+            alpha = arrays[1] if planes.has_alpha else None
+            results = apply_gradient_maps_to_planes(
+                arrays[0], alpha, gradient_specs, planes.base_image_path
+            )
+            del alpha
+            del arrays
+            return results
+        finally:
+            shm.close()
@@ -1,9 +1,303 @@
 """Core gradient mapping functions"""
 import io
+import platform
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+import PIL
 from PIL import Image
 import numpy as np
 
+from .kernels import luminance, map_gradient, map_luminance
+
+try:
+    import imagecodecs
+except ImportError:
+    imagecodecs = None
+
+try:
+    from turbojpeg import TurboJPEG, TJFLAG_PROGRESSIVE, TJPF_RGB
+    _turbojpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    # PyTurboJPEG missing, or libjpeg-turbo not found on the system
+    _turbojpeg = None
+
+JPEG_SUFFIXES = {".jpg", ".jpeg"}
+
+
+# Room for every gradient of a full Hytale gradient set (~220 maps) plus
+# edits, at 1 KiB per LUT
+@lru_cache(maxsize=512)
+def _load_gradient_lut(path_str, mtime_ns):
+    """Decode a gradient map into a 256-entry RGBA colour LUT (cached)
+
+    Gradient maps only vary horizontally, so the rows are averaged into one
+    and linearly resampled to 256 entries instead of running a LANCZOS
+    resize over the whole image. Alpha is preset to 255 so RGBA pixels can
+    be gathered whole.
+    """
+    gradient = np.asarray(Image.open(path_str).convert("RGB"), dtype=np.float64)
+    row = gradient.mean(axis=0)
+
+    width = row.shape[0]
+    if width != 256:
+        xs = np.linspace(0, width - 1, 256)
+        positions = np.arange(width)
+        row = np.stack(
+            [np.interp(xs, positions, row[:, c]) for c in range(3)], axis=1
+        )
+
+    lut = np.full((256, 4), 255, dtype=np.uint8)
+    lut[:, :3] = np.rint(row)
+    lut.flags.writeable = False
+    return lut
+
+
+# LUTs handed over by the parent process: path -> (mtime_ns, LUT), so a
+# newer version of a gradient replaces the old one
+_preloaded_luts = {}
+
+
+def preload_gradient_luts(luts):
+    """Install gradient LUTs built elsewhere, e.g. sent along with pool work
+
+    Args:
+        luts: Dict mapping (path string, mtime_ns) to a (256, 4) uint8 LUT
+    """
+    for (path_str, mtime_ns), lut in luts.items():
+        _preloaded_luts[path_str] = (mtime_ns, lut)
+
+
+def build_gradient_luts(gradient_map_paths):
+    """Build LUTs for several gradient maps, ready for preload_gradient_luts()
+
+    Gradients that cannot be read are left out; they fail later with a
+    proper per-task error message.
+
+    Args:
+        gradient_map_paths: Iterable of gradient map paths
+
+    Returns:
+        dict: Mapping of (path string, mtime_ns) to LUT
+    """
+    luts = {}
+    for gradient_map_path in gradient_map_paths:
+        try:
+            gradient_map_path = Path(gradient_map_path)
+            key = (str(gradient_map_path), gradient_map_path.stat().st_mtime_ns)
+            luts[key] = _load_gradient_lut(*key)
+        except Exception:
+            continue
+    return luts
+
+
+def load_gradient_lut(gradient_map_path):
+    """Load a gradient map as a 256x4 uint8 RGBA LUT
+
+    Results are cached per worker process and keyed by path and
+    modification time, so edited gradients are picked up automatically.
+
+    Args:
+        gradient_map_path: Path to gradient map file
+
+    Returns:
+        np.ndarray: Read-only uint8 array of shape (256, 4); alpha is 255
+    """
+    gradient_map_path = Path(gradient_map_path)
+    path_str = str(gradient_map_path)
+    mtime_ns = gradient_map_path.stat().st_mtime_ns
+    preloaded = _preloaded_luts.get(path_str)
+    if preloaded is not None and preloaded[0] == mtime_ns:
+        return preloaded[1]
+    return _load_gradient_lut(path_str, mtime_ns)
+
+
+def _open_base_image(source):
+    """Open a base image as RGB, or as RGBA when it carries transparency
+
+    Opaque images skip the alpha plane, which shrinks every pixel pass
+    by a quarter.
+
+    Args:
+        source: Path or file object of the base image
+
+    Returns:
+        PIL.Image.Image: Image in RGB or RGBA mode
+    """
+    return _convert_base_image(Image.open(source))
+
+
+def _convert_base_image(img):
+    """Convert an opened image to RGB, or RGBA when it carries transparency"""
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        return img.convert("RGBA")
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def _palette_planes(img):
+    """Luminance and alpha planes of a paletted image without expanding it
+
+    Luminance is computed for the (at most 256) palette entries once and
+    then gathered through the pixel indices, so the image is never
+    converted to RGBA.
+
+    Args:
+        img: PIL image in P mode
+
+    Returns:
+        tuple: (luminance, alpha) uint8 arrays; alpha is None when the
+        palette carries no transparency
+    """
+    indices = np.array(img)
+
+    # Let PIL resolve the palette (and any tRNS alpha) the same way a full
+    # conversion would, on a 256-pixel strip holding every index
+    strip = Image.frombytes("P", (256, 1), bytes(range(256)))
+    palette_mode = img.palette.mode
+    strip.putpalette(img.getpalette(rawmode=palette_mode), rawmode=palette_mode)
+    strip.info = dict(img.info)
+    palette = np.array(_convert_base_image(strip))[0]
+
+    lum = np.take(luminance(palette[np.newaxis])[0], indices)
+    alpha = np.take(palette[:, 3], indices) if palette.shape[1] == 4 else None
+    return lum, alpha
+
+
+def _decode_planes(source):
+    """Decode a base image into luminance and alpha planes
+
+    JPEG files are decoded with libjpeg-turbo when PyTurboJPEG is
+    available. Greyscale pixels are used as the luminance directly and
+    paletted images are mapped through their palette; everything else is
+    converted to RGB or RGBA first.
+
+    Args:
+        source: Path to the base image
+
+    Returns:
+        tuple: (luminance, alpha) uint8 arrays of shape (H, W); alpha is
+        None when the image is opaque
+    """
+    is_jpeg_path = isinstance(source, (str, Path)) and Path(source).suffix.lower() in JPEG_SUFFIXES
+    if _turbojpeg is not None and is_jpeg_path:
+        with open(source, "rb") as f:
+            return luminance(_turbojpeg.decode(f.read(), pixel_format=TJPF_RGB)), None
+
+    img = Image.open(source)
+    if img.mode == "P":
+        return _palette_planes(img)
+
+    if img.mode in ("L", "LA") and "transparency" not in img.info:
+        # Greyscale: the pixels are the luminance, with every weight
+        # summing to 1 in both the float and integer formulas
+        gray = np.array(img)
+        if gray.ndim == 2:
+            return gray, None
+        return np.ascontiguousarray(gray[..., 0]), np.ascontiguousarray(gray[..., 1])
+
+    base_array = np.array(_convert_base_image(img))
+    alpha = None
+    if base_array.shape[2] == 4:
+        alpha = np.ascontiguousarray(base_array[..., 3])
+    return luminance(base_array), alpha
+
+
+def _pil_save(output_array, output, output_format, **save_kwargs):
+    """Save an RGB or RGBA array through Pillow"""
+    mode = "RGBA" if output_array.shape[2] == 4 else "RGB"
+    Image.fromarray(output_array, mode).save(output, output_format, **save_kwargs)
+
+
+def _save_jpeg(output_array, output, quality, fast_encode):
+    # Drop alpha for JPEG
+    if output_array.shape[2] == 4:
+        output_array = np.ascontiguousarray(output_array[..., :3])
+    if _turbojpeg is not None:
+        # The TurboJPEG API has no flag for Pillow's optimize=True, but
+        # progressive encoding always builds optimal Huffman tables and
+        # is at least as small as an optimized baseline file
+        _write_bytes(output, _turbojpeg.encode(
+            output_array, quality=quality, pixel_format=TJPF_RGB,
+            flags=0 if fast_encode else TJFLAG_PROGRESSIVE
+        ))
+        return
+    _pil_save(output_array, output, "JPEG", quality=quality, optimize=not fast_encode)
+
+
+def _save_png(output_array, output, quality, fast_encode):
+    # Fast zlib level keeps encoding off the critical path; size can be
+    # reclaimed afterwards with optimize_pngs()
+    if imagecodecs is not None:
+        _write_bytes(output, imagecodecs.png_encode(output_array, level=1))
+        return
+    _pil_save(output_array, output, "PNG", compress_level=1)
+
+
+def _save_webp(output_array, output, quality, fast_encode):
+    method = 0 if fast_encode else 6
+    if imagecodecs is not None:
+        # imagecodecs defaults to lossless VP8L, which ignores the level;
+        # match Pillow's lossy output
+        _write_bytes(output, imagecodecs.webp_encode(
+            output_array, level=quality, lossless=False, method=method
+        ))
+        return
+    _pil_save(output_array, output, "WEBP", quality=quality, method=method)
+
+
+# Encoder per canonical output format
+_SAVERS = {
+    "JPEG": _save_jpeg,
+    "PNG": _save_png,
+    "WEBP": _save_webp,
+}
+
+
+def _canonical_format(output_format):
+    """Upper-case an output format name and map JPG to JPEG"""
+    output_format = output_format.upper()
+    return "JPEG" if output_format == "JPG" else output_format
+
+
+def _save_image(output_array, output, output_format, quality, fast_encode=False):
+    """Encode an RGB or RGBA array with format-appropriate settings
+
+    PNG and WebP are encoded with imagecodecs and JPEG with libjpeg-turbo
+    when those are installed, writing the pixel buffer without building a
+    PIL image. Pillow handles everything else.
+
+    Args:
+        output_array: uint8 array of shape (H, W, 3) or (H, W, 4)
+        output: Output path or writable file object
+        output_format: Output format (PNG, JPEG, WEBP)
+        quality: Image quality for JPEG/WebP (1-100)
+        fast_encode: Favour encode speed over file size (for previews):
+            skips the JPEG optimize pass and uses the fastest WebP method
+    """
+    output_format = _canonical_format(output_format)
+    saver = _SAVERS.get(output_format)
+    if saver is None:
+        _pil_save(output_array, output, output_format)
+    else:
+        saver(output_array, output, quality, fast_encode)
+
+
+def _write_bytes(output, data):
+    """Write encoded image bytes to a path or writable file object"""
+    if hasattr(output, "write"):
+        output.write(data)
+    else:
+        with open(output, "wb") as f:
+            f.write(data)
+
+
+def _display_name(path):
+    """Short name of a path for status messages"""
+    return path.name if hasattr(path, 'name') else path
+
 
 def apply_gradient_map(
     base_image_path, gradient_map_path, output_path, quality=95, output_format="PNG"
@@ -21,117 +315,297 @@ def apply_gradient_map(
         tuple: (success: bool, message: str)
     """
     try:
-        # Load images
-        base_img = Image.open(base_image_path).convert("RGBA")
-        gradient_img = Image.open(gradient_map_path).convert("RGB")
+        # Load images; the decoded base is cached, so repeated calls for
+        # the same base only pay for the LUT lookup
+        lum, alpha = decode_base_image(base_image_path)
+        gradient_array = load_gradient_lut(gradient_map_path)
+
+        # Map luminance through the gradient, keeping the original alpha
+        output_array = map_luminance(lum, alpha, gradient_array)
 
-        # Resize gradient to 256x1 if needed
-        gradient_img = gradient_img.resize((256, 1), Image.LANCZOS)
+        # Save output image
+        _save_image(output_array, output_path, output_format, quality)
 
-        # Convert to numpy arrays
-        base_array = np.array(base_img)
-        gradient_array = np.array(gradient_img)[0]  # Get first row
+        return True, f"✓ Created: {_display_name(output_path)}"
 
-        # Extract RGB and alpha channels
-        rgb = base_array[:, :, :3]
-        alpha = base_array[:, :, 3]
+    except Exception as e:
+        return False, f"✗ Error processing {_display_name(base_image_path)}: {e}"
 
-        # Calculate luminance (grayscale value) using standard weights
-        luminance = (
-            rgb[:, :, 0] * 0.299 + rgb[:, :, 1] * 0.587 + rgb[:, :, 2] * 0.114
-        ).astype(np.uint8)
 
-        # Apply gradient map by using luminance as index
-        output_rgb = gradient_array[luminance]
+@lru_cache(maxsize=4)
+def _decode_base_image(path_str, mtime_ns):
+    """Decode a base image into read-only luminance and alpha planes (cached)"""
+    lum, alpha = _decode_planes(path_str)
+    lum.flags.writeable = False
+    if alpha is not None:
+        alpha.flags.writeable = False
+    return lum, alpha
 
-        # Combine with original alpha channel
-        output_array = np.dstack([output_rgb, alpha])
 
-        # Create and save output image
-        output_img = Image.fromarray(output_array.astype(np.uint8), "RGBA")
+def clear_base_image_cache():
+    """Drop the decoded base images cached by decode_base_image()
 
-        # Save with appropriate format and quality
-        save_kwargs = {}
-        if output_format.upper() in ["JPEG", "JPG"]:
-            # Convert RGBA to RGB for JPEG
-            output_img = output_img.convert("RGB")
-            save_kwargs["quality"] = quality
-            save_kwargs["optimize"] = True
-        elif output_format.upper() == "PNG":
-            save_kwargs["optimize"] = True
-        elif output_format.upper() == "WEBP":
-            save_kwargs["quality"] = quality
-            save_kwargs["method"] = 6
+    Long-running processes that decode in-process (the web server's job
+    runner) call this once a batch is done, so the planes do not stay
+    resident between jobs; pool workers keep theirs.
+    """
+    _decode_base_image.cache_clear()
 
-        output_img.save(output_path, output_format.upper(), **save_kwargs)
 
-        return True, f"✓ Created: {output_path.name if hasattr(output_path, 'name') else output_path}"
+def decode_base_image(base_image_path):
+    """Decode a base image into luminance and alpha planes
 
-    except Exception as e:
-        return False, f"✗ Error processing {base_image_path.name if hasattr(base_image_path, 'name') else base_image_path}: {e}"
+    The last few decoded images are cached per process and keyed by path
+    and modification time, so tasks that revisit a base skip decoding it.
+    See clear_base_image_cache().
 
+    Args:
+        base_image_path: Path to base image file
 
-def apply_gradient_map_from_memory(
-    base_image_bytes, gradient_map_path, quality=95, output_format="PNG", max_dimension=None
+    Returns:
+        tuple: (luminance, alpha) read-only uint8 arrays of shape (H, W);
+        alpha is None when the image is opaque
+    """
+    base_image_path = Path(base_image_path)
+    return _decode_base_image(str(base_image_path), base_image_path.stat().st_mtime_ns)
+
+
+def apply_gradient_maps_to_planes(
+    lum, alpha, gradient_specs, base_image_path, encode_workers=1, cancel_check=None
 ):
-    """Apply a gradient map to an image in memory (for web use)
+    """Apply several gradient maps to a decoded base image
+
+    Mapping and encoding are pipelined: while up to `encode_workers`
+    results are being encoded on writer threads, the next gradient is
+    already mapped into a spare output buffer.
+
+    Args:
+        lum: uint8 luminance array of shape (H, W)
+        alpha: uint8 alpha array of shape (H, W), or None if opaque
+        gradient_specs: List of (gradient_map_path, output_path, quality,
+            output_format) tuples
+        base_image_path: Path of the base image (used in messages)
+        encode_workers: Number of writer threads encoding outputs
+        cancel_check: Optional callable; once it returns True no further
+            gradients are mapped, and saves already started are finished
+
+    Returns:
+        list: (success: bool, message: str) tuple per gradient spec
+        processed, which is fewer than given when cancelled
+    """
+    channels = 3 if alpha is None else 4
+    encode_workers = max(1, min(encode_workers, len(gradient_specs)))
+
+    # One buffer per in-flight save plus one being mapped
+    buffers = [
+        np.empty(lum.shape + (channels,), dtype=np.uint8)
+        for _ in range(encode_workers + 1)
+    ]
+    results = []
+    pending = deque()
+
+    def finish_oldest():
+        future, value = pending.popleft()
+        if future is None:
+            # Mapping already failed; value is the error message
+            results.append((False, value))
+            return
+        try:
+            future.result()
+            results.append((True, f"✓ Created: {_display_name(value)}"))
+        except Exception as e:
+            results.append(
+                (False, f"✗ Error processing {_display_name(base_image_path)}: {e}")
+            )
+
+    with ThreadPoolExecutor(max_workers=encode_workers) as writer:
+        for i, (gradient_map_path, output_path, quality, output_format) in enumerate(gradient_specs):
+            if cancel_check and cancel_check():
+                break
+            error = None
+            try:
+                gradient_array = load_gradient_lut(gradient_map_path)
+                output_array = map_luminance(
+                    lum, alpha, gradient_array, buffers[i % len(buffers)]
+                )
+            except Exception as e:
+                error = f"✗ Error processing {_display_name(base_image_path)}: {e}"
+
+            # Bound the saves in flight, so the buffer the next gradient
+            # maps into is never still being encoded
+            while len(pending) >= encode_workers:
+                finish_oldest()
+
+            if error:
+                pending.append((None, error))
+                continue
+
+            future = writer.submit(_save_image, output_array, output_path, output_format, quality)
+            pending.append((future, output_path))
+
+        while pending:
+            finish_oldest()
+
+    return results
+
+
+def apply_gradient_maps_batch(base_image_path, gradient_specs):
+    """Apply several gradient maps to one base image
+
+    The base image is decoded and its luminance computed once, then reused
+    for every gradient.
+
+    Args:
+        base_image_path: Path to base image file
+        gradient_specs: List of (gradient_map_path, output_path, quality,
+            output_format) tuples
+
+    Returns:
+        list: (success: bool, message: str) tuple per gradient spec
+    """
+    try:
+        lum, alpha = decode_base_image(base_image_path)
+    except Exception as e:
+        message = f"✗ Error processing {_display_name(base_image_path)}: {e}"
+        return [(False, message) for _ in gradient_specs]
+
+    return apply_gradient_maps_to_planes(lum, alpha, gradient_specs, base_image_path)
+
+
+def load_base_image_array(base_image_bytes, max_dimension=None, mode=None):
+    """Decode and optionally downscale an in-memory base image
 
     Args:
         base_image_bytes: Image data as bytes or BytesIO
-        gradient_map_path: Path to gradient map file
-        quality: Image quality for JPEG/WebP (1-100)
-        output_format: Output format (PNG, JPEG, WEBP)
         max_dimension: Optional max width/height for resizing (for preview)
+        mode: Optional PIL mode to convert to after resizing
 
     Returns:
-        bytes: Processed image as bytes
+        np.ndarray: uint8 RGB or RGBA array (or `mode`, when given)
     """
     # Load base image from bytes
     if isinstance(base_image_bytes, bytes):
-        base_img = Image.open(io.BytesIO(base_image_bytes)).convert("RGBA")
+        base_img = _open_base_image(io.BytesIO(base_image_bytes))
     else:
-        base_img = Image.open(base_image_bytes).convert("RGBA")
+        base_img = _open_base_image(base_image_bytes)
 
     # Resize if max_dimension specified (for previews)
     if max_dimension:
         base_img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
 
+    # Convert after resizing so only the smaller image is touched
+    if mode and base_img.mode != mode:
+        base_img = base_img.convert(mode)
+
+    # Convert to numpy array
+    return np.array(base_img)
+
+
+def _map_image_in_memory(base_image_bytes, gradient_map_path, max_dimension=None, mode=None):
+    """Decode, optionally downscale and gradient-map an in-memory image
+
+    Args:
+        base_image_bytes: Image data as bytes or BytesIO
+        gradient_map_path: Path to gradient map file
+        max_dimension: Optional max width/height for resizing (for preview)
+        mode: Optional PIL mode to convert to after resizing
+
+    Returns:
+        np.ndarray: Gradient-mapped uint8 array
+    """
+    base_array = load_base_image_array(base_image_bytes, max_dimension, mode)
+
     # Load gradient
-    gradient_img = Image.open(gradient_map_path).convert("RGB")
-    gradient_img = gradient_img.resize((256, 1), Image.LANCZOS)
+    gradient_array = load_gradient_lut(gradient_map_path)
+
+    # Apply gradient map in place
+    return map_gradient(base_array, gradient_array, out=base_array)
 
-    # Convert to numpy arrays
-    base_array = np.array(base_img)
-    gradient_array = np.array(gradient_img)[0]
 
-    # Extract RGB and alpha channels
-    rgb = base_array[:, :, :3]
-    alpha = base_array[:, :, 3]
+def encode_gradient_mapped_array(
+    base_array, gradient_map_path, quality=95, output_format="PNG", fast_encode=False
+):
+    """Apply a gradient map to a decoded base image and encode the result
 
-    # Calculate luminance
-    luminance = (
-        rgb[:, :, 0] * 0.299 + rgb[:, :, 1] * 0.587 + rgb[:, :, 2] * 0.114
-    ).astype(np.uint8)
+    The base array is left untouched, so one decode can serve several
+    gradients.
 
-    # Apply gradient map
-    output_rgb = gradient_array[luminance]
-    output_array = np.dstack([output_rgb, alpha])
+    Args:
+        base_array: uint8 RGB or RGBA array, e.g. from load_base_image_array
+        gradient_map_path: Path to gradient map file
+        quality: Image quality for JPEG/WebP (1-100)
+        output_format: Output format (PNG, JPEG, WEBP)
+        fast_encode: Favour encode speed over file size (for preview)
 
-    # Create output image
-    output_img = Image.fromarray(output_array.astype(np.uint8), "RGBA")
+    Returns:
+        bytes: Processed image as bytes
+    """
+    output_array = map_gradient(base_array, load_gradient_lut(gradient_map_path))
+    output_bytes = io.BytesIO()
+    _save_image(output_array, output_bytes, output_format, quality, fast_encode)
+    return output_bytes.getvalue()
 
-    # Save to bytes
-    save_kwargs = {}
-    if output_format.upper() in ["JPEG", "JPG"]:
-        output_img = output_img.convert("RGB")
-        save_kwargs["quality"] = quality
-        save_kwargs["optimize"] = True
-    elif output_format.upper() == "PNG":
-        save_kwargs["optimize"] = True
-    elif output_format.upper() == "WEBP":
-        save_kwargs["quality"] = quality
-        save_kwargs["method"] = 6
 
+def apply_gradient_map_from_memory(
+    base_image_bytes, gradient_map_path, quality=95, output_format="PNG", max_dimension=None,
+    fast_encode=False
+):
+    """Apply a gradient map to an image in memory (for web use)
+
+    Args:
+        base_image_bytes: Image data as bytes or BytesIO
+        gradient_map_path: Path to gradient map file
+        quality: Image quality for JPEG/WebP (1-100)
+        output_format: Output format (PNG, JPEG, WEBP)
+        max_dimension: Optional max width/height for resizing (for preview)
+        fast_encode: Favour encode speed over file size (for preview)
+
+    Returns:
+        bytes: Processed image as bytes
+    """
+    output_array = _map_image_in_memory(base_image_bytes, gradient_map_path, max_dimension)
+
+    # Save to bytes
     output_bytes = io.BytesIO()
-    output_img.save(output_bytes, output_format.upper(), **save_kwargs)
+    _save_image(output_array, output_bytes, output_format, quality, fast_encode)
     return output_bytes.getvalue()
+
+
+def apply_gradient_map_raw(base_image_bytes, gradient_map_path, max_dimension=None):
+    """Apply a gradient map to an image in memory without encoding the result
+
+    Skips the image encode entirely, so a same-origin client can draw the
+    pixels straight onto a canvas.
+
+    Args:
+        base_image_bytes: Image data as bytes or BytesIO
+        gradient_map_path: Path to gradient map file
+        max_dimension: Optional max width/height for resizing (for preview)
+
+    Returns:
+        np.ndarray: C-contiguous uint8 RGBA array of shape (H, W, 4)
+    """
+    return _map_image_in_memory(base_image_bytes, gradient_map_path, max_dimension, mode="RGBA")
+
+
+def is_pillow_simd():
+    """Check whether the loaded PIL build is Pillow-SIMD
+
+    Pillow-SIMD releases are published as post-releases of the matching
+    Pillow version (e.g. 9.5.0.post1).
+
+    Returns:
+        bool: True if Pillow-SIMD is loaded
+    """
+    return ".post" in PIL.__version__
+
+
+def pillow_simd_recommended():
+    """Check whether switching to Pillow-SIMD would speed up image I/O
+
+    Returns:
+        bool: True on x86 machines running stock Pillow
+    """
+    machine = platform.machine().lower()
+    is_x86 = machine in ("x86_64", "amd64", "i386", "i686")
+    return is_x86 and not is_pillow_simd()
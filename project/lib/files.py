@@ -1,5 +1,8 @@
 """File system operations for gradient mapper"""
 import os
+import shutil
+import subprocess
+import threading
 from pathlib import Path
 from typing import Dict, List
 from dataclasses import dataclass
@@ -14,6 +17,34 @@ class GradientInfo:
     relative_path: str
 
 
+IMAGE_EXTENSIONS = frozenset({"png", "jpg", "jpeg", "webp"})
+
+
+def _iter_image_entries(root, extensions=IMAGE_EXTENSIONS, dir_mtimes=None):
+    """Recursively yield DirEntry objects for image files under root
+
+    Uses os.scandir directly so file type checks come from the cached
+    directory entry instead of a separate stat per file.
+
+    Args:
+        root: Folder to scan
+        extensions: Set of lowercase extensions without the leading dot
+        dir_mtimes: Optional dict that receives the mtime of every directory
+            scanned, taken before the directory is listed
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        directory = stack.pop()
+        if dir_mtimes is not None:
+            dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.rpartition(".")[2].lower() in extensions and entry.is_file():
+                    yield entry
+
+
 def get_image_files(folder, extensions=(".png", ".jpg", ".jpeg", ".webp")):
     """Get all image files in a folder recursively
 
@@ -22,16 +53,107 @@ def get_image_files(folder, extensions=(".png", ".jpg", ".jpeg", ".webp")):
         extensions: Tuple of valid file extensions
 
     Returns:
-        List of relative paths to image files
+        Sorted list of relative paths to image files
     """
-    image_files = []
-    for root, dirs, files in os.walk(folder):
-        for file in files:
-            if file.lower().endswith(extensions):
-                # Get relative path from the base folder
-                rel_path = os.path.relpath(os.path.join(root, file), folder)
-                image_files.append(rel_path)
-    return image_files
+    folder = os.fspath(folder)
+    extensions = frozenset(ext.lower().lstrip(".") for ext in extensions)
+    return sorted(
+        os.path.relpath(entry.path, folder)
+        for entry in _iter_image_entries(folder, extensions)
+    )
+
+
+class ImageFileIndex:
+    """Image files under a folder, rescanned only when the tree changes
+
+    Adding, removing or renaming a file changes the mtime of its directory,
+    so checking the index costs one stat per directory rather than a
+    resolve and stat per file. Symlinked files are only indexed when they
+    point inside the folder. Safe to share between threads: checks and
+    rescans run under a lock, and the file map is replaced, never mutated.
+    """
+
+    def __init__(self, folder, extensions=IMAGE_EXTENSIONS):
+        """Initialize the index
+
+        Args:
+            folder: Path to folder to index
+            extensions: Set of lowercase extensions without the leading dot
+        """
+        self.folder = Path(folder)
+        self.extensions = frozenset(extensions)
+        self._files: Dict[str, Path] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Incremented on every rescan, so callers can cache derived data
+        self.generation = 0
+
+    def _is_current(self):
+        if not self._dir_mtimes:
+            return False
+        try:
+            return all(
+                os.stat(directory).st_mtime_ns == mtime
+                for directory, mtime in self._dir_mtimes.items()
+            )
+        except OSError:
+            return False
+
+    def _rescan(self):
+        root = os.fspath(self.folder)
+        real_root = os.path.realpath(root)
+        dir_mtimes = {}
+        files = {}
+        try:
+            for entry in _iter_image_entries(root, self.extensions, dir_mtimes):
+                if entry.is_symlink():
+                    target = os.path.realpath(entry.path)
+                    if os.path.commonpath([real_root, target]) != real_root:
+                        continue
+                files[os.path.relpath(entry.path, root)] = Path(entry.path)
+        except FileNotFoundError:
+            dir_mtimes, files = {}, {}
+        self._dir_mtimes = dir_mtimes
+        self._files = files
+        self.generation += 1
+
+    def invalidate(self):
+        """Force a rescan on next access, e.g. after overwriting a file
+
+        Rewriting an existing file does not touch its directory's mtime.
+        """
+        self._dir_mtimes = {}
+
+    def files(self) -> Dict[str, Path]:
+        """Get the indexed files
+
+        Returns:
+            Dictionary mapping relative paths to full paths
+        """
+        with self._lock:
+            if not self._is_current():
+                self._rescan()
+            return self._files
+
+    def lookup(self, relative_path: str):
+        """Find an indexed file by relative path
+
+        A miss on a file that does exist forces a rescan, so a file added
+        within the filesystem's timestamp granularity is still found.
+
+        Args:
+            relative_path: Path relative to the folder
+
+        Returns:
+            Full path of the file, or None if it is not in the folder
+        """
+        key = os.path.normpath(relative_path)
+        path = self.files().get(key)
+        if path is None and os.path.isfile(os.path.join(self.folder, key)):
+            with self._lock:
+                self._rescan()
+                path = self._files.get(key)
+        return path
 
 
 def scan_gradients(gradient_folder: Path) -> Dict[str, List[GradientInfo]]:
@@ -46,32 +168,30 @@ def scan_gradients(gradient_folder: Path) -> Dict[str, List[GradientInfo]]:
     gradients_by_category = {}
 
     # Scan for gradient files
-    for root, dirs, files in os.walk(gradient_folder):
-        for file in files:
-            if file.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
-                full_path = Path(root) / file
-                relative_path = full_path.relative_to(gradient_folder)
-
-                # Determine category from parent folder
-                if relative_path.parent == Path("."):
-                    # File is in root gradient folder
-                    category = "Uncategorized"
-                else:
-                    # Use parent folder name as category
-                    category = relative_path.parent.name
-
-                # Create GradientInfo
-                gradient_info = GradientInfo(
-                    name=file,
-                    category=category,
-                    path=full_path,
-                    relative_path=str(relative_path)
-                )
-
-                # Add to category
-                if category not in gradients_by_category:
-                    gradients_by_category[category] = []
-                gradients_by_category[category].append(gradient_info)
+    for entry in _iter_image_entries(gradient_folder):
+        full_path = Path(entry.path)
+        relative_path = full_path.relative_to(gradient_folder)
+
+        # Determine category from parent folder
+        if relative_path.parent == Path("."):
+            # File is in root gradient folder
+            category = "Uncategorized"
+        else:
+            # Use parent folder name as category
+            category = relative_path.parent.name
+
+        # Create GradientInfo
+        gradient_info = GradientInfo(
+            name=entry.name,
+            category=category,
+            path=full_path,
+            relative_path=str(relative_path)
+        )
+
+        # Add to category
+        if category not in gradients_by_category:
+            gradients_by_category[category] = []
+        gradients_by_category[category].append(gradient_info)
 
     # Sort categories and gradients within each category
     sorted_categories = {}
@@ -92,3 +212,30 @@ def ensure_folders(*folders):
     """
     for folder in folders:
         Path(folder).mkdir(parents=True, exist_ok=True)
+
+
+def optimize_pngs(paths, level=2, batch_size=256):
+    """Losslessly recompress PNG files in place with oxipng
+
+    Files are passed to oxipng in batches, so a whole run costs a few
+    process launches rather than one per image.
+
+    Args:
+        paths: Paths of PNG files to optimize
+        level: oxipng optimization level (0-6)
+        batch_size: Maximum number of files per oxipng invocation
+
+    Returns:
+        bool: True if oxipng ran successfully on every batch, False if it
+        is not installed or reported an error
+    """
+    oxipng = shutil.which("oxipng")
+    if oxipng is None:
+        return False
+
+    paths = [str(p) for p in paths]
+    ok = True
+    for i in range(0, len(paths), batch_size):
+        command = [oxipng, "-o", str(level), "--strip", "safe", "-q", *paths[i:i + batch_size]]
+        ok = subprocess.run(command).returncode == 0 and ok
+    return ok
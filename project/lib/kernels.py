@@ -0,0 +1,255 @@
+"""Pixel kernels for gradient mapping
+
+The fused kernel is compiled with Numba when it is installed. Without Numba
+the same operations run as separate NumPy passes.
+"""
+import os
+import sys
+
+import numpy as np
+
+# The web server runs the parallel kernels from worker threads, after which
+# the TBB threading layer hangs at interpreter exit; prefer OpenMP unless
+# the environment already picks a layer. Numba reads this on first import.
+if not os.environ.get("NUMBA_THREADING_LAYER"):
+    os.environ.setdefault("NUMBA_THREADING_LAYER_PRIORITY", "omp tbb workqueue")
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
+
+
+# BT.601 luminance weights (0.299, 0.587, 0.114) scaled to sum to 256
+LUMA_WEIGHTS = (77, 150, 29)
+
+# Rows per band for the NumPy path: ~128 rows of a 4K image keeps the
+# band's temporaries within L2. Tune for other cache sizes via the env var.
+TILE_ROWS = max(1, int(os.environ.get("GRADIENT_MAPPER_TILE_ROWS", "128")))
+
+
+def luminance(rgb):
+    """Compute 8-bit luminance of an RGB array with integer weights
+
+    Uses OpenCV's single-pass SIMD conversion when it is installed (same
+    BT.601 weights). Otherwise works in uint16 with in-place operations
+    so no float temporaries are allocated. Both round to nearest and stay
+    within 1 LSB of the float formula.
+
+    RGBA input is read in place rather than sliced to RGB first, which
+    would force OpenCV to copy the pixels into a contiguous buffer.
+
+    Args:
+        rgb: uint8 array of shape (H, W, 3) or (H, W, 4); alpha is ignored
+
+    Returns:
+        np.ndarray: uint8 array of shape (H, W)
+    """
+    if HAS_CV2:
+        code = cv2.COLOR_RGBA2GRAY if rgb.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        return cv2.cvtColor(np.ascontiguousarray(rgb), code)
+
+    wr, wg, wb = LUMA_WEIGHTS
+    lum = np.multiply(rgb[..., 0], wr, dtype=np.uint16)
+    tmp = np.multiply(rgb[..., 1], wg, dtype=np.uint16)
+    np.add(lum, tmp, out=lum)
+    np.multiply(rgb[..., 2], wb, out=tmp, dtype=np.uint16)
+    np.add(lum, tmp, out=lum)
+    # Round to nearest; the sum peaks at 255 * 256 + 128, within uint16
+    np.add(lum, 128, out=lum)
+    np.right_shift(lum, 8, out=lum)
+    return lum.astype(np.uint8)
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _map_gradient_numba(base, lut, out):
+        """Luminance, LUT lookup and alpha copy in a single pass"""
+        height, width, channels = base.shape
+        for y in prange(height):
+            for x in range(width):
+                lum = (
+                    base[y, x, 0] * 77
+                    + base[y, x, 1] * 150
+                    + base[y, x, 2] * 29
+                    + 128
+                ) >> 8
+                out[y, x, 0] = lut[lum, 0]
+                out[y, x, 1] = lut[lum, 1]
+                out[y, x, 2] = lut[lum, 2]
+                if channels == 4:
+                    out[y, x, 3] = base[y, x, 3]
+
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _map_luminance_numba(lum, alpha, lut, out):
+        """LUT lookup and alpha copy for precomputed luminance in one pass"""
+        height, width = lum.shape
+        for y in prange(height):
+            for x in range(width):
+                idx = lum[y, x]
+                out[y, x, 0] = lut[idx, 0]
+                out[y, x, 1] = lut[idx, 1]
+                out[y, x, 2] = lut[idx, 2]
+                if alpha is not None:
+                    out[y, x, 3] = alpha[y, x]
+
+    # RGBA variants working on whole pixels as little-endian uint32 words
+    # (R in the low byte, alpha in the high byte): one load of the LUT
+    # entry and one store per pixel, which LLVM can vectorise
+
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _map_gradient_rgba32_numba(base, lut, out):
+        """Fused RGBA luminance, LUT lookup and alpha copy on pixel words"""
+        height, width = base.shape
+        for y in prange(height):
+            for x in range(width):
+                pixel = base[y, x]
+                lum = (
+                    (pixel & 0xFF) * 77
+                    + ((pixel >> 8) & 0xFF) * 150
+                    + ((pixel >> 16) & 0xFF) * 29
+                    + 128
+                ) >> 8
+                out[y, x] = (lut[lum] & 0x00FFFFFF) | (pixel & 0xFF000000)
+
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _map_luminance_rgba32_numba(lum, alpha, lut, out):
+        """RGBA LUT lookup and alpha merge on pixel words"""
+        height, width = lum.shape
+        for y in prange(height):
+            for x in range(width):
+                out[y, x] = (lut[lum[y, x]] & 0x00FFFFFF) | (np.uint32(alpha[y, x]) << 24)
+
+
+def _pixel_words(array):
+    """View a C-contiguous (..., 4) uint8 array as (...) uint32 words"""
+    return array.view(np.uint32)[..., 0]
+
+
+def _use_pixel_words(lut, *arrays):
+    """Whether the uint32 RGBA kernels apply to these arrays"""
+    return (
+        sys.byteorder == "little"
+        and lut.shape[1] == 4
+        and lut.flags.c_contiguous
+        and all(a.shape[-1] == 4 and a.flags.c_contiguous for a in arrays)
+    )
+
+
+def map_gradient(base, lut, out=None):
+    """Apply a gradient LUT to an RGB or RGBA image
+
+    Args:
+        base: uint8 array of shape (H, W, 3) or (H, W, 4)
+        lut: uint8 array of shape (256, 3), or (256, 4) with opaque alpha
+        out: Optional uint8 output array shaped like base. May be base
+            itself to map in place.
+
+    Returns:
+        np.ndarray: Gradient-mapped uint8 array shaped like base; alpha
+        is copied through when present
+    """
+    # Numba specialises kernels on memory layout; keep inputs C-contiguous
+    # so the unit-stride (vectorisable) specialisation is the one that
+    # runs. An in-place base is left alone so results still land in it.
+    if out is not base:
+        base = np.ascontiguousarray(base)
+    if out is None:
+        out = np.empty_like(base)
+
+    if HAS_NUMBA:
+        if _use_pixel_words(lut, base, out):
+            _map_gradient_rgba32_numba(_pixel_words(base), _pixel_words(lut), _pixel_words(out))
+        else:
+            _map_gradient_numba(base, lut, out)
+        return out
+
+    # Work in row bands so each band's luminance and output stay in cache
+    # instead of streaming whole-image temporaries through DRAM per pass.
+    # The fused Numba kernel already makes a single pass over each row.
+    has_alpha = base.shape[2] == 4
+    for y0 in range(0, base.shape[0], TILE_ROWS):
+        band = base[y0:y0 + TILE_ROWS]
+        lum = luminance(band)
+        alpha = band[..., 3] if has_alpha else None
+        map_luminance(lum, alpha, lut, out[y0:y0 + TILE_ROWS])
+    return out
+
+
+def map_luminance(lum, alpha, lut, out=None):
+    """Apply a gradient LUT to a precomputed luminance map
+
+    Args:
+        lum: uint8 luminance array of shape (H, W)
+        alpha: uint8 alpha array of shape (H, W), or None for opaque images
+        lut: uint8 array of shape (256, 3), or (256, 4) with opaque alpha
+        out: Optional uint8 output array of shape (H, W, 4), or (H, W, 3)
+            when alpha is None
+
+    Returns:
+        np.ndarray: Gradient-mapped uint8 RGBA array, or RGB when alpha
+        is None
+    """
+    channels = 3 if alpha is None else 4
+    if out is None:
+        out = np.empty(lum.shape + (channels,), dtype=np.uint8)
+
+    lum = np.ascontiguousarray(lum)
+    if alpha is not None:
+        alpha = np.ascontiguousarray(alpha)
+    lut = np.ascontiguousarray(lut)
+
+    if HAS_NUMBA:
+        if alpha is not None and _use_pixel_words(lut, out):
+            _map_luminance_rgba32_numba(lum, alpha, _pixel_words(lut), _pixel_words(out))
+        else:
+            _map_luminance_numba(lum, alpha, lut, out)
+        return out
+
+    # take() writes straight into the output, skipping the temporary that
+    # fancy indexing allocates; uint8 indices can never be out of range
+    rgba_gather = (
+        alpha is not None
+        and lut.shape[1] == 4
+        and lut.flags.c_contiguous
+        and out.flags.c_contiguous
+        and not np.may_share_memory(alpha, out)
+    )
+    if rgba_gather:
+        # Gather whole RGBA pixels as 32-bit words, then overwrite alpha.
+        # Not used when mapping in place, where alpha lives inside out.
+        np.take(lut.view(np.uint32)[:, 0], lum, mode="clip", out=out.view(np.uint32)[..., 0])
+        out[..., 3] = alpha
+    else:
+        np.take(lut[:, :3], lum, axis=0, mode="clip", out=out[..., :3])
+        if alpha is not None:
+            out[..., 3] = alpha
+    return out
+
+
+def warm_up():
+    """Compile (or load from cache) the Numba kernels ahead of first use
+
+    The first call of each kernel otherwise pays JIT compilation and thread
+    pool start-up, which is noticeable on an interactive preview. No-op
+    without Numba.
+    """
+    if not HAS_NUMBA:
+        return
+    # Match the argument types used in practice: cached LUTs and decoded
+    # planes are read-only, and Numba specialises on that
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    lut.flags.writeable = False
+    for channels in (3, 4):
+        map_gradient(np.zeros((1, 1, channels), dtype=np.uint8), lut)
+    lum = np.zeros((1, 1), dtype=np.uint8)
+    lum.flags.writeable = False
+    map_luminance(lum, None, lut)
+    map_luminance(lum, lum, lut)
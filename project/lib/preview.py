@@ -1,9 +1,18 @@
 """Preview generation and thumbnail creation"""
 import io
-import base64
+import binascii
+import struct
 from pathlib import Path
+import numpy as np
 from PIL import Image
-from .core import apply_gradient_map_from_memory
+from .core import (
+    apply_gradient_map_from_memory,
+    apply_gradient_map_raw,
+    encode_gradient_mapped_array,
+    load_base_image_array,
+    load_gradient_lut,
+)
+from .kernels import map_gradient
 
 
 def generate_preview(image_data, gradient_path, max_dimension=400, quality=85, output_format="PNG"):
@@ -24,13 +33,15 @@ def generate_preview(image_data, gradient_path, max_dimension=400, quality=85, o
         with open(image_data, 'rb') as f:
             image_data = f.read()
 
-    # Apply gradient map with max_dimension for fast processing
+    # Apply gradient map with max_dimension and fast encoder settings,
+    # since preview size matters less than latency
     preview_bytes = apply_gradient_map_from_memory(
         image_data,
         gradient_path,
         quality=quality,
         output_format=output_format,
-        max_dimension=max_dimension
+        max_dimension=max_dimension,
+        fast_encode=True
     )
 
     return preview_bytes
@@ -54,51 +65,205 @@ def generate_preview_base64(image_data, gradient_path, max_dimension=400, qualit
     )
 
     # Convert to base64 with data URI
-    b64_data = base64.b64encode(preview_bytes).decode('utf-8')
-    mime_type = f"image/{output_format.lower()}"
-    return f"data:{mime_type};base64,{b64_data}"
+    return _data_uri(f"image/{output_format.lower()}", preview_bytes)
 
 
-def create_thumbnail(gradient_path, size=(256, 10)):
+def generate_preview_raw(image_data, gradient_path, max_dimension=400):
+    """Generate an unencoded RGBA preview
+
+    Args:
+        image_data: Image data as bytes or file path
+        gradient_path: Path to gradient map file
+        max_dimension: Maximum width or height for preview (default: 400px)
+
+    Returns:
+        np.ndarray: uint8 RGBA array of shape (H, W, 4)
+    """
+    # If image_data is a path, read it
+    if isinstance(image_data, (str, Path)):
+        with open(image_data, 'rb') as f:
+            image_data = f.read()
+
+    return apply_gradient_map_raw(image_data, gradient_path, max_dimension=max_dimension)
+
+
+def prepare_preview_base(image_data, max_dimension=400, raw=False):
+    """Decode and downscale a base image once for several previews
+
+    Args:
+        image_data: Image data as bytes or file path
+        max_dimension: Maximum width or height for preview (default: 400px)
+        raw: Prepare for render_preview_raw (RGBA) rather than
+            render_preview_base64
+
+    Returns:
+        np.ndarray: Read-only uint8 array of the downscaled base image
+    """
+    # If image_data is a path, read it
+    if isinstance(image_data, (str, Path)):
+        with open(image_data, 'rb') as f:
+            image_data = f.read()
+
+    base_array = load_base_image_array(image_data, max_dimension, mode="RGBA" if raw else None)
+    base_array.flags.writeable = False
+    return base_array
+
+
+def render_preview_base64(base_array, gradient_path, quality=85, output_format="PNG"):
+    """Render a base64-encoded preview from a prepared base image
+
+    Produces the same image as generate_preview_base64 for the same
+    source and max_dimension.
+
+    Args:
+        base_array: Array from prepare_preview_base
+        gradient_path: Path to gradient map file
+        quality: Image quality
+        output_format: Output format
+
+    Returns:
+        str: Base64-encoded preview image with data URI prefix
+    """
+    preview_bytes = encode_gradient_mapped_array(
+        base_array, gradient_path, quality, output_format, fast_encode=True
+    )
+    return _data_uri(f"image/{output_format.lower()}", preview_bytes)
+
+
+def render_preview_raw(base_array, gradient_path):
+    """Render an unencoded RGBA preview from a prepared base image
+
+    Args:
+        base_array: Array from prepare_preview_base with raw=True
+        gradient_path: Path to gradient map file
+
+    Returns:
+        np.ndarray: uint8 RGBA array of shape (H, W, 4)
+    """
+    return map_gradient(base_array, load_gradient_lut(gradient_path))
+
+
+def _data_uri(mime_type, data):
+    """Build a base64 data URI; the payload is ASCII, so no UTF-8 decode"""
+    prefix = f"data:{mime_type};base64,".encode("ascii")
+    return (prefix + binascii.b2a_base64(data, newline=False)).decode("ascii")
+
+
+def create_thumbnail(gradient_path, size=(256, 10), output_format="PNG"):
     """Create a thumbnail of a gradient map
 
     Args:
         gradient_path: Path to gradient map file
         size: Tuple of (width, height) for thumbnail
+        output_format: PNG, or WEBP (lossless, about a quarter smaller)
 
     Returns:
         str: Base64-encoded thumbnail with data URI prefix
     """
+    # Anything other than WEBP is encoded as PNG
+    mime_type = "image/webp" if output_format.upper() == "WEBP" else "image/png"
     try:
-        # Load gradient image
-        gradient_img = Image.open(gradient_path).convert("RGB")
-
-        # Resize to thumbnail size
-        gradient_img = gradient_img.resize(size, Image.LANCZOS)
+        # Start from the cached 256-entry gradient row instead of decoding
+        # and resizing the full gradient image
+        row = load_gradient_lut(gradient_path)[np.newaxis, :, :3]
+        width, height = size
+        if width == row.shape[1]:
+            # Gradients are constant vertically, so repeat the row
+            pixels = np.broadcast_to(row, (height, width, 3))
+            gradient_img = Image.fromarray(np.ascontiguousarray(pixels), "RGB")
+        else:
+            # Resize to thumbnail size
+            gradient_img = Image.fromarray(np.ascontiguousarray(row), "RGB")
+            gradient_img = gradient_img.resize(size, Image.LANCZOS)
 
         # Convert to bytes
         output = io.BytesIO()
-        gradient_img.save(output, format="PNG", optimize=True)
+        if mime_type == "image/webp":
+            gradient_img.save(output, format="WEBP", lossless=True)
+        else:
+            gradient_img.save(output, format="PNG", optimize=True)
         thumbnail_bytes = output.getvalue()
 
         # Convert to base64
-        b64_data = base64.b64encode(thumbnail_bytes).decode('utf-8')
-        return f"data:image/png;base64,{b64_data}"
+        return _data_uri(mime_type, thumbnail_bytes)
 
     except Exception as e:
         # Return empty data URI on error
-        return f"data:image/png;base64,"
+        return f"data:{mime_type};base64,"
+
+
+# Enough of the file to reach the JPEG frame header past typical EXIF blocks
+_HEADER_PEEK_BYTES = 64 * 1024
+
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _peek_dimensions(header):
+    """Parse image dimensions from the start of a PNG, JPEG or WebP file
+
+    Args:
+        header: Leading bytes of the file
+
+    Returns:
+        tuple: (width, height), or None if the header is not recognised
+    """
+    if header[:8] == b"\x89PNG\r\n\x1a\n" and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        chunk = header[12:16]
+        if chunk == b"VP8 " and len(header) >= 30:
+            width, height = struct.unpack("<HH", header[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L" and len(header) >= 25:
+            bits = int.from_bytes(header[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X" and len(header) >= 30:
+            width = int.from_bytes(header[24:27], "little") + 1
+            height = int.from_bytes(header[27:30], "little") + 1
+            return width, height
+        return None
+
+    if header[:2] == b"\xff\xd8":
+        # Walk the marker segments up to the first start-of-frame
+        pos = 2
+        while pos + 9 <= len(header):
+            if header[pos] != 0xFF:
+                return None
+            marker = header[pos + 1]
+            if marker == 0xFF:
+                pos += 1
+                continue
+            if marker in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack(">HH", header[pos + 5:pos + 9])
+                return width, height
+            length = struct.unpack(">H", header[pos + 2:pos + 4])[0]
+            pos += 2 + length
+    return None
 
 
 def get_image_dimensions(image_data):
     """Get dimensions of an image
 
+    PNG, JPEG and WebP headers are parsed directly; other formats fall
+    back to PIL.
+
     Args:
         image_data: Image data as bytes or file path
 
     Returns:
         tuple: (width, height)
     """
+    if isinstance(image_data, (str, Path)):
+        with open(image_data, "rb") as f:
+            header = f.read(_HEADER_PEEK_BYTES)
+    else:
+        header = image_data
+
+    dimensions = _peek_dimensions(header)
+    if dimensions is not None:
+        return tuple(dimensions)
+
     if isinstance(image_data, (str, Path)):
         with Image.open(image_data) as img:
             return img.size
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Gradient Mapper Web UI server
+Usage: python run.py [--host HOST] [--port PORT] [--reload]
+"""
+
+import argparse
+import importlib.util
+
+
+def has_module(name):
+    """Check whether an optional module is importable without importing it"""
+    return importlib.util.find_spec(name) is not None
+
+
+def main():
+    """Start uvicorn with the fastest available event loop and HTTP parser"""
+    parser = argparse.ArgumentParser(description="Run the Gradient Mapper web UI")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Bind port (default: 8000)")
+    parser.add_argument("--reload", action="store_true", help="Restart on code changes")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    # uvloop and httptools come with uvicorn[standard] everywhere except
+    # Windows (no uvloop); fall back to the pure-Python implementations.
+    # A single worker, since jobs and their progress subscribers live in
+    # this process's memory.
+    uvicorn.run(
+        "web.backend.main:app",
+        host=args.host,
+        port=args.port,
+        reload=args.reload,
+        loop="uvloop" if has_module("uvloop") else "asyncio",
+        http="httptools" if has_module("httptools") else "h11",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 """REST API routes"""
+import asyncio
+import gzip
 import logging
 from pathlib import Path, PurePath
 from typing import List
 
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+import aiofiles
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
-from lib.files import get_image_files
-from lib.preview import generate_preview_base64, get_image_dimensions
+from lib.files import IMAGE_EXTENSIONS, ImageFileIndex
+from lib.preview import get_image_dimensions
 from ..models.schemas import (
+    BatchPreviewRequest,
+    BatchPreviewResponse,
     GradientCatalog,
     ImageInfo,
     ImageListResponse,
@@ -17,28 +22,51 @@ from ..models.schemas import (
     JobStatus,
     PreviewRequest,
     PreviewResponse,
+    UploadChunkResponse,
     UploadResponse,
+    UploadSessionRequest,
+    UploadSessionResponse,
 )
+from ..services.static_cache import etag_matches
+from ..services.upload_sessions import UploadCapacityError, UploadManager
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api")
 
+# Bytes copied per read when saving uploads
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Raw RGBA previews are gzipped here on a worker thread rather than by the
+# middleware on the event loop; level 1 is several times faster than the
+# middleware's 6 and still shrinks gradient-mapped pixels about sixfold
+RAW_GZIP_LEVEL = 1
+
 
 # These will be set by the main app
 gradient_scanner = None
 job_queue = None
 input_folder = None
 output_folder = None
+input_index = None
+preview_batcher = None
+upload_manager = None
 
+# (input_index generation, images) of the last listing
+_image_list_cache = (None, [])
 
-def set_dependencies(scanner, queue, inp_folder, out_folder):
+
+def set_dependencies(scanner, queue, batcher, inp_folder, out_folder):
     """Set dependencies (called from main.py)"""
-    global gradient_scanner, job_queue, input_folder, output_folder
+    global gradient_scanner, job_queue, preview_batcher, input_folder, output_folder, input_index
+    global upload_manager
     gradient_scanner = scanner
     job_queue = queue
+    preview_batcher = batcher
     input_folder = inp_folder
     output_folder = out_folder
+    input_index = ImageFileIndex(inp_folder)
+    upload_manager = UploadManager(inp_folder)
 
 
 def sanitize_filename(filename: str) -> str:
@@ -46,25 +74,132 @@ def sanitize_filename(filename: str) -> str:
     return PurePath(normalized).name
 
 
-def resolve_path(base: Path, relative_path: str) -> Path:
-    base_resolved = base.resolve()
-    candidate = (base / relative_path).resolve()
+async def find_input_image(relative_path: str) -> Path:
+    """Look up an image in the input folder
+
+    Uses the cached folder index, which only holds files inside the folder,
+    so no per-request resolve() is needed to reject path traversal. The
+    lookup stats the folder tree and may rescan it, so it runs on a
+    worker thread.
+    """
+    image_path = await asyncio.to_thread(input_index.lookup, relative_path)
+    if image_path is None:
+        raise HTTPException(status_code=404, detail=f"Image not found: {relative_path}")
+    return image_path
+
+
+def read_image_info(folder: Path, relative_path: str):
+    """Read size and dimensions of an image, or None if it is unreadable"""
+    full_path = folder / relative_path
     try:
-        candidate.relative_to(base_resolved)
-    except ValueError as exc:
-        raise HTTPException(status_code=403, detail="Access denied") from exc
-    return candidate
+        return ImageInfo(
+            filename=relative_path,
+            size=full_path.stat().st_size,
+            dimensions=get_image_dimensions(full_path)
+        )
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Error reading {relative_path}: {e}")
+        return None
+
+
+async def raw_pixels_response(http_request: Request, body, headers: dict) -> Response:
+    """Build a response for raw pixel data, gzipped off the event loop
+
+    Args:
+        http_request: Incoming request, for its Accept-Encoding
+        body: Pixel bytes (any bytes-like object)
+        headers: Response headers describing the pixels
+
+    Returns:
+        Response: application/octet-stream response
+    """
+    headers["Vary"] = "Accept-Encoding"
+    if "gzip" in http_request.headers.get("accept-encoding", "") and len(body) >= 512:
+        body = await asyncio.to_thread(gzip.compress, body, RAW_GZIP_LEVEL, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/octet-stream", headers=headers)
+
+
+async def resolve_preview_sources(request: PreviewRequest):
+    """Resolve the image and gradient paths of a preview request"""
+    image_path = await find_input_image(request.image_name)
+
+    gradient_path = gradient_scanner.get_gradient_path(request.gradient_path)
+    if gradient_path is None:
+        raise HTTPException(status_code=404, detail=f"Gradient not found: {request.gradient_path}")
+
+    return image_path, gradient_path
+
+
+async def make_raw_preview(request: PreviewRequest):
+    """Generate an unencoded RGBA preview for a request
+
+    Returns:
+        tuple: (H x W x 4 array, original (width, height))
+
+    Raises:
+        HTTPException: 404 if the image or gradient does not exist
+    """
+    image_path, gradient_path = await resolve_preview_sources(request)
+    original_dimensions = await asyncio.to_thread(get_image_dimensions, image_path)
+
+    pixels = await preview_batcher.generate(
+        image_path, gradient_path, request.max_dimension, raw=True
+    )
+    return pixels, original_dimensions
+
+
+async def make_preview(request: PreviewRequest) -> PreviewResponse:
+    """Generate a base64 PNG preview for a request
+
+    Raises:
+        HTTPException: 404 if the image or gradient does not exist
+    """
+    image_path, gradient_path = await resolve_preview_sources(request)
+
+    # Get original dimensions
+    original_dimensions = await asyncio.to_thread(get_image_dimensions, image_path)
+
+    # Generate preview, sharing the image decode with concurrent requests
+    preview_base64 = await preview_batcher.generate(
+        image_path, gradient_path, request.max_dimension
+    )
+
+    # Calculate preview dimensions
+    width, height = original_dimensions
+    if width > height:
+        new_width = min(width, request.max_dimension)
+        new_height = int(height * (new_width / width))
+    else:
+        new_height = min(height, request.max_dimension)
+        new_width = int(width * (new_height / height))
+
+    return PreviewResponse(
+        preview_image=preview_base64,
+        dimensions=(new_width, new_height),
+        original_dimensions=original_dimensions
+    )
 
 
 @router.get("/gradients", response_model=GradientCatalog)
-async def list_gradients():
-    """List all available gradients organized by category"""
+async def list_gradients(request: Request):
+    """List all available gradients organized by category
+
+    Served from the catalog serialized at scan time, with an ETag so an
+    unchanged catalog is revalidated with a bodiless 304.
+    """
     if gradient_scanner is None:
         raise HTTPException(status_code=500, detail="Gradient scanner not initialized")
 
     try:
-        catalog = gradient_scanner.get_catalog()
-        return catalog
+        catalog_json, etag = await asyncio.to_thread(gradient_scanner.get_catalog_json)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=catalog_json, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error listing gradients: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -93,26 +228,32 @@ async def upload_images(files: List[UploadFile] = File(...)):
             continue
 
         file_path = input_folder / safe_filename
-        content = await file.read()
 
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Copy in chunks so memory use does not grow with the file size
+        size = 0
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+                size += len(chunk)
 
         # Get file info
         try:
-            dimensions = get_image_dimensions(file_path)
+            dimensions = await asyncio.to_thread(get_image_dimensions, file_path)
             file_info = ImageInfo(
                 filename=safe_filename,
-                size=len(content),
+                size=size,
                 dimensions=dimensions
             )
             uploaded_files.append(file_info)
-            logger.info(f"Uploaded {safe_filename} ({len(content)} bytes)")
+            logger.info(f"Uploaded {safe_filename} ({size} bytes)")
         except Exception as e:
             logger.error(f"Error processing {safe_filename}: {e}")
             # Delete invalid file
             file_path.unlink(missing_ok=True)
 
+    # Uploads may overwrite files, which leaves directory mtimes unchanged
+    input_index.invalidate()
+
     if not uploaded_files:
         raise HTTPException(status_code=400, detail="No valid image files uploaded")
 
@@ -122,31 +263,127 @@ async def upload_images(files: List[UploadFile] = File(...)):
     )
 
 
+def get_upload_session(upload_id: str):
+    """Look up a resumable upload, raising 404 if it is unknown"""
+    if upload_manager is None:
+        raise HTTPException(status_code=500, detail="Input folder not configured")
+    session = upload_manager.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Upload not found: {upload_id}")
+    return session
+
+
+@router.post("/uploads", response_model=UploadSessionResponse)
+async def create_upload(request: UploadSessionRequest):
+    """Start a resumable upload
+
+    The file is then sent in chunk_size pieces with PATCH, in any order.
+    A client that lost its connection asks for the offset with HEAD and
+    resends from there.
+    """
+    if upload_manager is None:
+        raise HTTPException(status_code=500, detail="Input folder not configured")
+
+    safe_filename = sanitize_filename(request.filename)
+    if not safe_filename or safe_filename.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid filename: {request.filename}")
+    if safe_filename.rpartition(".")[2].lower() not in IMAGE_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Not a supported image: {request.filename}")
+
+    try:
+        session = await asyncio.to_thread(upload_manager.create, safe_filename, request.size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadCapacityError as e:
+        raise HTTPException(status_code=503, detail=f"{e}, try again shortly")
+
+    return UploadSessionResponse(
+        upload_id=session.upload_id,
+        chunk_size=session.chunk_size,
+        offset=session.offset
+    )
+
+
+@router.head("/uploads/{upload_id}")
+async def get_upload_offset(upload_id: str):
+    """Report how much of a resumable upload has arrived"""
+    session = get_upload_session(upload_id)
+    return Response(headers={
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.size),
+    })
+
+
+@router.patch("/uploads/{upload_id}", response_model=UploadChunkResponse)
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """Store one chunk of a resumable upload
+
+    The body is the raw chunk, starting at `offset`. The response to the
+    last chunk carries the uploaded file's info.
+    """
+    session = get_upload_session(upload_id)
+
+    try:
+        await upload_manager.write_chunk(session, offset, request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not session.complete or session.finishing:
+        return UploadChunkResponse(offset=session.offset, complete=False)
+
+    session.finishing = True
+    file_path = await asyncio.to_thread(upload_manager.finish, session)
+
+    # Overwriting a file leaves directory mtimes unchanged
+    input_index.invalidate()
+
+    try:
+        dimensions = await asyncio.to_thread(get_image_dimensions, file_path)
+    except Exception as e:
+        logger.error(f"Error processing {session.filename}: {e}")
+        file_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"Not a valid image: {session.filename}")
+
+    return UploadChunkResponse(
+        offset=session.size,
+        complete=True,
+        file=ImageInfo(
+            filename=session.filename,
+            size=session.size,
+            dimensions=dimensions
+        )
+    )
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Abort a resumable upload and discard its chunks"""
+    get_upload_session(upload_id)
+    await asyncio.to_thread(upload_manager.discard, upload_id)
+    return {"message": "Upload aborted"}
+
+
 @router.get("/images", response_model=ImageListResponse)
 async def list_images():
     """List all images in input folder"""
+    global _image_list_cache
     if input_folder is None:
         raise HTTPException(status_code=500, detail="Input folder not configured")
 
     try:
-        # Get image files
-        image_files = get_image_files(input_folder)
-
-        images = []
-        for img_path in image_files:
-            full_path = input_folder / img_path
-            if full_path.exists():
-                try:
-                    dimensions = get_image_dimensions(full_path)
-                    size = full_path.stat().st_size
-
-                    images.append(ImageInfo(
-                        filename=img_path,
-                        size=size,
-                        dimensions=dimensions
-                    ))
-                except Exception as e:
-                    logger.warning(f"Error reading {img_path}: {e}")
+        # Re-read image headers only when the folder contents changed;
+        # the index itself costs one stat per directory to check
+        image_files = await asyncio.to_thread(input_index.files)
+        generation, images = _image_list_cache
+        if generation != input_index.generation:
+            generation = input_index.generation
+            # Header reads block, so they run on worker threads in parallel
+            infos = await asyncio.gather(
+                *(asyncio.to_thread(read_image_info, input_folder, img_path)
+                  for img_path in sorted(image_files))
+            )
+            images = [info for info in infos if info is not None]
+            _image_list_cache = (generation, images)
 
         return ImageListResponse(
             images=images,
@@ -164,11 +401,7 @@ async def get_image(image_path: str):
     if input_folder is None:
         raise HTTPException(status_code=500, detail="Input folder not configured")
 
-    file_path = resolve_path(input_folder, image_path)
-    if not file_path.exists() or not file_path.is_file():
-        raise HTTPException(status_code=404, detail=f"Image not found: {image_path}")
-
-    return FileResponse(file_path)
+    return FileResponse(await find_input_image(image_path))
 
 
 @router.post("/preview", response_model=PreviewResponse)
@@ -178,50 +411,111 @@ async def generate_preview(request: PreviewRequest):
         raise HTTPException(status_code=500, detail="Service not configured")
 
     try:
-        # Get image path
-        image_path = resolve_path(input_folder, request.image_name)
-        if not image_path.exists():
-            raise HTTPException(status_code=404, detail=f"Image not found: {request.image_name}")
-
-        # Get gradient path
-        gradient_path = gradient_scanner.get_gradient_path(request.gradient_path)
-        if gradient_path is None:
-            raise HTTPException(status_code=404, detail=f"Gradient not found: {request.gradient_path}")
-
-        # Get original dimensions
-        original_dimensions = get_image_dimensions(image_path)
-
-        # Generate preview
-        preview_base64 = generate_preview_base64(
-            image_path,
-            gradient_path,
-            max_dimension=request.max_dimension,
-            quality=85,
-            output_format="PNG"
-        )
+        return await make_preview(request)
+
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
+    except Exception as e:
+        logger.error(f"Error generating preview: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/preview/batch", response_model=BatchPreviewResponse)
+async def generate_previews(batch: BatchPreviewRequest):
+    """Generate several previews in one request
 
-        # Calculate preview dimensions
-        width, height = original_dimensions
-        if width > height:
-            new_width = min(width, request.max_dimension)
-            new_height = int(height * (new_width / width))
+    Previews of the same image are rendered together by the preview
+    batcher. A preview that fails is returned as null, so one bad entry
+    does not fail the batch.
+    """
+    if input_folder is None or gradient_scanner is None:
+        raise HTTPException(status_code=500, detail="Service not configured")
+
+    results = await asyncio.gather(
+        *(make_preview(request) for request in batch.requests),
+        return_exceptions=True
+    )
+
+    previews = []
+    for request, result in zip(batch.requests, results):
+        if isinstance(result, Exception):
+            if not isinstance(result, (HTTPException, asyncio.TimeoutError)):
+                logger.error(f"Error generating preview for {request.image_name}: {result}")
+            previews.append(None)
         else:
-            new_height = min(height, request.max_dimension)
-            new_width = int(width * (new_height / height))
+            previews.append(result)
+    return BatchPreviewResponse(previews=previews)
 
-        return PreviewResponse(
-            preview_image=preview_base64,
-            dimensions=(new_width, new_height),
-            original_dimensions=original_dimensions
-        )
+
+@router.post("/preview/raw")
+async def generate_raw_preview(request: PreviewRequest, http_request: Request):
+    """Generate an unencoded RGBA preview of gradient-mapped image
+
+    The body is the H x W x 4 pixel buffer, described by the Content-Shape
+    ("H,W,4") and Original-Dimensions ("W,H") headers.
+    """
+    if input_folder is None or gradient_scanner is None:
+        raise HTTPException(status_code=500, detail="Service not configured")
+
+    try:
+        pixels, original_dimensions = await make_raw_preview(request)
+
+        height, width, channels = pixels.shape
+        return await raw_pixels_response(http_request, pixels.data.cast("B"), {
+            "Content-Shape": f"{height},{width},{channels}",
+            "Original-Dimensions": f"{original_dimensions[0]},{original_dimensions[1]}",
+        })
 
     except HTTPException:
         raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
     except Exception as e:
-        logger.error(f"Error generating preview: {e}")
+        logger.error(f"Error generating raw preview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/preview/raw/batch")
+async def generate_raw_previews(batch: BatchPreviewRequest, http_request: Request):
+    """Generate several unencoded RGBA previews in one request
+
+    The body is the pixel buffers concatenated in request order. The
+    Content-Shapes ("H,W,4;...") and Original-Dimensions ("W,H;...")
+    headers hold one entry per request; the entry is empty where a
+    preview failed, and that preview contributes no bytes.
+    """
+    if input_folder is None or gradient_scanner is None:
+        raise HTTPException(status_code=500, detail="Service not configured")
+
+    results = await asyncio.gather(
+        *(make_raw_preview(request) for request in batch.requests),
+        return_exceptions=True
+    )
+
+    buffers = []
+    shapes = []
+    originals = []
+    for request, result in zip(batch.requests, results):
+        if isinstance(result, Exception):
+            if not isinstance(result, (HTTPException, asyncio.TimeoutError)):
+                logger.error(f"Error generating raw preview for {request.image_name}: {result}")
+            shapes.append("")
+            originals.append("")
+            continue
+        pixels, original_dimensions = result
+        height, width, channels = pixels.shape
+        buffers.append(pixels.data.cast("B"))
+        shapes.append(f"{height},{width},{channels}")
+        originals.append(f"{original_dimensions[0]},{original_dimensions[1]}")
+
+    return await raw_pixels_response(http_request, b"".join(buffers), {
+        "Content-Shapes": ";".join(shapes),
+        "Original-Dimensions": ";".join(originals),
+    })
+
+
 @router.post("/jobs", response_model=JobResponse)
 async def create_job(job_request: JobRequest):
     """Submit a batch processing job"""
@@ -263,7 +557,7 @@ async def get_job_status(job_id: str):
 
 
 @router.get("/jobs/{job_id}/download")
-async def download_job_results(job_id: str, background_tasks: BackgroundTasks):
+async def download_job_results(job_id: str):
     """Download job results as ZIP file"""
     if job_queue is None:
         raise HTTPException(status_code=500, detail="Job queue not configured")
@@ -282,18 +576,16 @@ async def download_job_results(job_id: str, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=404, detail="No output files found")
 
     try:
-        # Create ZIP archive
+        # Stream the ZIP archive as it is built, without a temp file
         from ..services.zip_service import ZipService
-        zip_path = ZipService.create_job_archive(job_id, output_files)
-
-        background_tasks.add_task(zip_path.unlink, missing_ok=True)
+        archive = ZipService.stream_archive(output_files)
 
-        # Return ZIP file
-        return FileResponse(
-            zip_path,
+        return StreamingResponse(
+            archive,
             media_type="application/zip",
-            filename=f"gradient_mapper_{job_id[:8]}.zip",
-            background=background_tasks
+            headers={
+                "Content-Disposition": f'attachment; filename="gradient_mapper_{job_id[:8]}.zip"'
+            }
         )
 
     except Exception as e:
@@ -1,8 +1,12 @@
 """WebSocket handler for real-time progress updates"""
+import asyncio
 import logging
+from collections import deque
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import json
 
+from ..services.messages import dumps_message
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -17,44 +21,126 @@ def set_job_queue(queue):
     job_queue = queue
 
 
+# Frames queued per connection before stale progress ticks are dropped
+OUTBOX_SIZE = 64
+
+_PROGRESS_PREFIX = '{"type":"progress",'
+_PROGRESS_KEY_END = ',"current":'
+
+
+class Outbox:
+    """Frames waiting to be written to one connection
+
+    Bounded for slow clients: once `maxsize` frames are queued, progress
+    frames superseded by a later one for the same job are dropped.
+    Progress is cumulative, so only the latest matters; frames carrying
+    the full state, and every other message (complete, error, cancelled,
+    acks), are always kept.
+    """
+
+    def __init__(self, maxsize: int = OUTBOX_SIZE):
+        self.maxsize = maxsize
+        self._frames: deque[str] = deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def put_nowait(self, data: str):
+        """Queue a frame, dropping stale progress if the outbox is full"""
+        if len(self._frames) >= self.maxsize:
+            self._drop_stale_progress()
+        self._frames.append(data)
+        self._ready.set()
+
+    async def get(self) -> str:
+        """Wait for and remove the oldest frame"""
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
+
+    def _drop_stale_progress(self):
+        # Walk newest first, keeping the latest compact tick per job
+        latest = set()
+        kept = deque()
+        for data in reversed(self._frames):
+            if data.startswith(_PROGRESS_PREFIX) and '"status":' not in data:
+                key = data[:data.find(_PROGRESS_KEY_END)]
+                if key in latest:
+                    continue
+                latest.add(key)
+            kept.appendleft(data)
+        self._frames = kept
+
+
 class ConnectionManager:
     """Manages WebSocket connections"""
 
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        # Keyed by id(websocket) so removal is O(1); iterate over a
+        # snapshot, since connections come and go between awaits
+        self.active_connections: dict[int, WebSocket] = {}
+        self._outboxes: dict[int, Outbox] = {}
+        self._writers: dict[int, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket):
         """Accept new WebSocket connection"""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        key = id(websocket)
+        self.active_connections[key] = websocket
+        outbox = Outbox()
+        self._outboxes[key] = outbox
+        self._writers[key] = asyncio.create_task(self._drain_outbox(websocket, outbox))
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        key = id(websocket)
+        self.active_connections.pop(key, None)
+        self._outboxes.pop(key, None)
+        writer = self._writers.pop(key, None)
+        if writer is not None:
+            writer.cancel()
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
 
-    async def send_message(self, websocket: WebSocket, message: dict):
-        """Send message to specific WebSocket"""
-        try:
-            await websocket.send_text(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Error sending message: {e}")
-
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connections"""
-        disconnected = []
-        for connection in self.active_connections:
+    async def _drain_outbox(self, websocket: WebSocket, outbox: Outbox):
+        """Write queued frames to a connection in order"""
+        while True:
+            data = await outbox.get()
             try:
-                await connection.send_text(json.dumps(message))
+                await websocket.send_text(data)
             except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
+                logger.error(f"Error sending message: {e}")
+                self._outboxes.pop(id(websocket), None)
+                return
+
+    def send_sync(self, websocket: WebSocket, data: str):
+        """Queue a pre-serialized frame for a WebSocket without waiting
+
+        Frames for a closed connection are dropped.
+        """
+        outbox = self._outboxes.get(id(websocket))
+        if outbox is not None:
+            outbox.put_nowait(data)
+
+    def send_message(self, websocket: WebSocket, message: dict):
+        """Send message to specific WebSocket"""
+        self.send_sync(websocket, dumps_message(message))
 
-        # Remove disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+    def broadcast(self, message: dict):
+        """Broadcast message to all connections
+
+        The message is encoded once and the same frame is queued for every
+        connection; connections whose writer has failed are evicted.
+        """
+        data = dumps_message(message)
+        for key, connection in list(self.active_connections.items()):
+            outbox = self._outboxes.get(key)
+            if outbox is not None:
+                outbox.put_nowait(data)
+            else:
+                self.disconnect(connection)
 
 
 manager = ConnectionManager()
@@ -84,22 +170,23 @@ async def websocket_endpoint(websocket: WebSocket):
                         if job_id in subscriptions:
                             job_queue.unsubscribe_progress(job_id, subscriptions[job_id])
 
-                        async def progress_callback(progress_data):
-                            await manager.send_message(websocket, progress_data)
-
-                        job_queue.subscribe_progress(job_id, progress_callback)
-                        subscriptions[job_id] = progress_callback
-                        logger.info(f"WebSocket subscribed to job {job_id}")
+                        def progress_callback(payload):
+                            manager.send_sync(websocket, payload)
 
-                        # Send acknowledgment
-                        await manager.send_message(websocket, {
+                        # Acknowledge first: subscribing to a running job
+                        # immediately queues its full progress state
+                        manager.send_message(websocket, {
                             "type": "subscribed",
                             "job_id": job_id
                         })
 
+                        if job_queue.subscribe_progress(job_id, progress_callback):
+                            subscriptions[job_id] = progress_callback
+                        logger.info(f"WebSocket subscribed to job {job_id}")
+
                 elif message.get("type") == "ping":
                     # Respond to ping
-                    await manager.send_message(websocket, {"type": "pong"})
+                    manager.send_message(websocket, {"type": "pong"})
 
             except json.JSONDecodeError:
                 logger.warning(f"Invalid JSON received: {data}")
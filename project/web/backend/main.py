@@ -1,17 +1,22 @@
 """FastAPI main application"""
 import logging
 import os
+import threading
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
+from lib.core import pillow_simd_recommended
+from lib.kernels import warm_up
 from .api import routes, websocket
 from .services.gradient_scanner import GradientScanner
 from .services.job_queue import JobQueue
+from .services.messages import FastJSONResponse
+from .services.preview_batcher import PreviewBatcher
+from .services.static_cache import StaticAssetCache
 
 # Configure logging
 logging.basicConfig(
@@ -21,21 +26,18 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Folder paths
-BASE_DIR = Path(__file__).parent.parent.parent
+# Folder paths, absolute so later joins never depend on the working directory
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 INPUT_FOLDER = BASE_DIR / "input"
 GRADIENT_FOLDER = BASE_DIR / "gradient"
 OUTPUT_FOLDER = BASE_DIR / "output"
 FRONTEND_DIR = BASE_DIR / "web" / "frontend"
 
-# Ensure folders exist
-INPUT_FOLDER.mkdir(parents=True, exist_ok=True)
-GRADIENT_FOLDER.mkdir(parents=True, exist_ok=True)
-OUTPUT_FOLDER.mkdir(parents=True, exist_ok=True)
-
 # Initialize services
 gradient_scanner = GradientScanner(GRADIENT_FOLDER)
 job_queue = JobQueue(INPUT_FOLDER, GRADIENT_FOLDER, OUTPUT_FOLDER)
+static_assets = StaticAssetCache(FRONTEND_DIR)
+preview_batcher = PreviewBatcher()
 
 def _parse_bool(value: str | None, default: bool = False) -> bool:
     if value is None:
@@ -55,6 +57,28 @@ if "*" in cors_origins:
     cors_allow_credentials = False
 
 
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves already-compressed responses alone
+
+    Image files and ZIP archives are already compressed, so those routes
+    bypass compression. Raw preview buffers are gzipped by their own
+    routes on a worker thread, keeping that CPU off the event loop.
+    """
+
+    def __init__(self, app, uncompressed_prefixes=(), uncompressed_suffixes=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.uncompressed_prefixes = tuple(uncompressed_prefixes)
+        self.uncompressed_suffixes = tuple(uncompressed_suffixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope["path"]
+            if path.startswith(self.uncompressed_prefixes) or path.endswith(self.uncompressed_suffixes):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting Gradient Mapper Web UI...")
@@ -64,10 +88,25 @@ async def lifespan(app: FastAPI):
     logger.info(f"Output folder: {OUTPUT_FOLDER}")
     logger.info(f"Frontend directory: {FRONTEND_DIR}")
 
+    # Ensure folders exist; done at startup rather than on import, so
+    # importing the app (tests, tooling) has no side effects
+    for folder in (INPUT_FOLDER, GRADIENT_FOLDER, OUTPUT_FOLDER):
+        folder.mkdir(parents=True, exist_ok=True)
+    if pillow_simd_recommended():
+        logger.warning(
+            "Stock Pillow detected; install pillow-simd for faster image resize and conversion"
+        )
+
+    # Compile the pixel kernels in the background so the first preview
+    # does not wait on JIT start-up
+    threading.Thread(target=warm_up, name="kernel-warm-up", daemon=True).start()
+
     gradient_scanner.initialize()
+    static_assets.initialize()
     routes.set_dependencies(
         gradient_scanner,
         job_queue,
+        preview_batcher,
         INPUT_FOLDER,
         OUTPUT_FOLDER
     )
@@ -76,6 +115,7 @@ async def lifespan(app: FastAPI):
     logger.info("Gradient Mapper Web UI started successfully")
     yield
     logger.info("Shutting down Gradient Mapper Web UI...")
+    job_queue.close()
 
 
 # Create FastAPI app
@@ -83,7 +123,8 @@ app = FastAPI(
     title="Gradient Mapper Web UI",
     description="Apply gradient maps to images with real-time preview and batch processing",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -95,20 +136,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON, HTML, JS and CSS; level 6 is most of level 9's ratio
+# at a fraction of the CPU
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=512,
+    compresslevel=6,
+    uncompressed_prefixes=("/api/images/", "/api/preview/raw"),
+    uncompressed_suffixes=("/download",),
+)
+
 # Include routers
 app.include_router(routes.router)
 app.include_router(websocket.router)
 
-# Mount static files for frontend
-app.mount("/static", StaticFiles(directory=str(FRONTEND_DIR)), name="static")
+
+@app.get("/static/{file_path:path}")
+async def read_static(file_path: str, request: Request):
+    """Serve frontend assets from memory"""
+    response = static_assets.response(request, file_path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
 
 @app.get("/")
-async def read_root():
+async def read_root(request: Request):
     """Serve frontend HTML"""
-    index_path = FRONTEND_DIR / "index.html"
-    if index_path.exists():
-        return FileResponse(index_path)
+    response = static_assets.response(request, "index.html")
+    if response is not None:
+        return response
     else:
         return {"message": "Gradient Mapper API", "docs": "/docs"}
 
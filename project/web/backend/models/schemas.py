@@ -1,6 +1,14 @@
 """Pydantic models for API requests and responses"""
 from typing import Dict, List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+# Minimum milliseconds between progress messages for a job over the
+# WebSocket; the frontend can rely on updates arriving no faster
+PROGRESS_INTERVAL_MS = 50
+
+# Most tasks accepted in one job; checked on the raw list before the
+# tasks themselves are validated
+MAX_JOB_TASKS = 10_000
 
 
 class GradientInfo(BaseModel):
@@ -9,7 +17,7 @@ class GradientInfo(BaseModel):
     category: str
     path: str
     relative_path: str
-    thumbnail: str  # base64 encoded thumbnail
+    thumbnail: str  # base64 encoded WebP thumbnail (data URI)
 
 
 class GradientCatalog(BaseModel):
@@ -39,6 +47,16 @@ class PreviewResponse(BaseModel):
     original_dimensions: tuple[int, int]
 
 
+class BatchPreviewRequest(BaseModel):
+    """Request to generate several previews at once"""
+    requests: List[PreviewRequest] = Field(min_length=1, max_length=256)
+
+
+class BatchPreviewResponse(BaseModel):
+    """Batch preview response, in request order"""
+    previews: List[Optional[PreviewResponse]]  # None where a preview failed
+
+
 class JobTask(BaseModel):
     """A single task in a batch job"""
     image_name: str
@@ -47,12 +65,33 @@ class JobTask(BaseModel):
 
 class JobRequest(BaseModel):
     """Request to create a batch processing job"""
-    tasks: List[JobTask]
+    tasks: List[JobTask] = Field(max_length=MAX_JOB_TASKS)
     output_format: str = Field(default="png", pattern="^(png|jpeg|webp)$")
     quality: int = Field(default=95, ge=1, le=100)
     prefix: Optional[str] = None
     suffix: Optional[str] = None
 
+    @field_validator("tasks", mode="before")
+    @classmethod
+    def limit_task_count(cls, tasks):
+        """Reject oversized task lists before validating each task"""
+        if isinstance(tasks, list) and len(tasks) > MAX_JOB_TASKS:
+            raise ValueError(f"At most {MAX_JOB_TASKS} tasks per job")
+        return tasks
+
+    @field_validator("tasks")
+    @classmethod
+    def drop_duplicate_tasks(cls, tasks: List[JobTask]) -> List[JobTask]:
+        """Drop repeated (image, gradient) pairs, which would write the same output twice"""
+        seen = set()
+        unique = []
+        for task in tasks:
+            key = (task.image_name, task.gradient_path)
+            if key not in seen:
+                seen.add(key)
+                unique.append(task)
+        return unique
+
 
 class JobResponse(BaseModel):
     """Response when creating a job"""
@@ -79,6 +118,26 @@ class UploadResponse(BaseModel):
     message: str
 
 
+class UploadSessionRequest(BaseModel):
+    """Request to start a resumable upload"""
+    filename: str
+    size: int = Field(ge=1)  # bytes
+
+
+class UploadSessionResponse(BaseModel):
+    """State of a resumable upload"""
+    upload_id: str
+    chunk_size: int
+    offset: int  # bytes received without gaps
+
+
+class UploadChunkResponse(BaseModel):
+    """Response after a chunk of a resumable upload is stored"""
+    offset: int
+    complete: bool
+    file: Optional[ImageInfo] = None  # set once the upload is complete
+
+
 class ImageListResponse(BaseModel):
     """List of available images"""
     images: List[ImageInfo]
@@ -1,9 +1,13 @@
 """Gradient scanner service - scans and caches gradient catalog"""
+import hashlib
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 
-from lib.files import scan_gradients
+from lib.files import ImageFileIndex, scan_gradients
 from lib.preview import create_thumbnail
 from ..models.schemas import GradientInfo, GradientCatalog
 
@@ -21,29 +25,73 @@ class GradientScanner:
         """
         self.gradient_folder = gradient_folder
         self.catalog: Optional[GradientCatalog] = None
+        # Serialized catalog and its ETag, built once per scan
+        self.catalog_json: bytes = b""
+        self.catalog_etag: str = ""
         self._gradients_by_path: Dict[str, Path] = {}  # For quick path lookup
+        # Tracks folder changes between requests without a full rescan
+        self._index = ImageFileIndex(gradient_folder)
+        self._scanned_generation: Optional[int] = None
+        # relative path -> (mtime_ns, size, thumbnail), so a rescan only
+        # draws thumbnails for new or changed gradients
+        self._thumbnails: Dict[str, tuple[int, int, str]] = {}
+        # Held for a whole scan, so startup and request-time refreshes
+        # never scan at the same time
+        self._scan_lock = threading.Lock()
 
     def initialize(self):
         """Scan gradients and build catalog"""
+        with self._scan_lock:
+            self._scan()
+
+    def _scan(self):
+        """Scan gradients and build catalog (caller holds the scan lock)"""
         logger.info(f"Scanning gradients in {self.gradient_folder}...")
 
+        # Taken before scanning, so changes made during the scan are
+        # picked up by the next refresh
+        self._index.files()
+        generation = self._index.generation
+
         # Scan gradients using lib.files
         gradients_dict = scan_gradients(self.gradient_folder)
 
+        # Reuse thumbnails of gradients whose file is unchanged
+        thumbnails = {}
+        stale = []
+        for gradient_list in gradients_dict.values():
+            for gradient in gradient_list:
+                try:
+                    stat = gradient.path.stat()
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    signature = (0, 0)
+                cached = self._thumbnails.get(gradient.relative_path)
+                if cached is not None and cached[:2] == signature:
+                    thumbnails[gradient.relative_path] = cached
+                else:
+                    stale.append((gradient, signature))
+
+        # Generate the rest in parallel; PIL releases the GIL while
+        # decoding, resizing and encoding. Thumbnails are drawn from the
+        # gradient LUTs, so this also warms the LUT cache for previews
+        if stale:
+            workers = min(32, (os.cpu_count() or 1) * 4, len(stale))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                drawn = executor.map(self._create_thumbnail, (g for g, _ in stale))
+                for (gradient, signature), thumbnail in zip(stale, drawn):
+                    thumbnails[gradient.relative_path] = (*signature, thumbnail)
+
         # Build catalog with thumbnails
         categories = {}
+        gradients_by_path = {}
         total_count = 0
 
         for category, gradient_list in gradients_dict.items():
             category_gradients = []
 
             for gradient in gradient_list:
-                # Generate thumbnail
-                try:
-                    thumbnail = create_thumbnail(gradient.path, size=(256, 10))
-                except Exception as e:
-                    logger.warning(f"Failed to create thumbnail for {gradient.name}: {e}")
-                    thumbnail = "data:image/png;base64,"
+                thumbnail = thumbnails[gradient.relative_path][2]
 
                 # Create GradientInfo
                 gradient_info = GradientInfo(
@@ -57,18 +105,66 @@ class GradientScanner:
                 category_gradients.append(gradient_info)
 
                 # Add to path lookup
-                self._gradients_by_path[gradient.relative_path] = gradient.path
+                gradients_by_path[gradient.relative_path] = gradient.path
 
                 total_count += 1
 
             categories[category] = category_gradients
 
-        self.catalog = GradientCatalog(
+        catalog = GradientCatalog(
             categories=categories,
             total_count=total_count
         )
+        catalog_json = catalog.model_dump_json().encode()
+
+        # Swap everything in at once for requests served during a rescan
+        self.catalog = catalog
+        self._gradients_by_path = gradients_by_path
+        self._thumbnails = thumbnails
+        self.catalog_json = catalog_json
+        self.catalog_etag = f'"{hashlib.blake2b(catalog_json, digest_size=16).hexdigest()}"'
+        self._scanned_generation = generation
+
+        logger.info(
+            f"Scanned {total_count} gradients in {len(categories)} categories "
+            f"({len(stale)} thumbnails drawn)"
+        )
+
+    def refresh(self):
+        """Rescan if files were added or removed since the last scan
+
+        Costs one stat per gradient directory when nothing changed, and
+        only new or modified gradients get new thumbnails when it did.
+        """
+        with self._scan_lock:
+            self._index.files()
+            if self._index.generation != self._scanned_generation:
+                self._scan()
+
+    def get_catalog_json(self) -> tuple[bytes, str]:
+        """Get the serialized catalog, rescanning first if the folder changed
 
-        logger.info(f"Scanned {total_count} gradients in {len(categories)} categories")
+        Returns:
+            tuple: (JSON bytes, quoted ETag)
+
+        Raises:
+            RuntimeError: If scanner not initialized
+        """
+        if self.catalog is None:
+            raise RuntimeError("GradientScanner not initialized. Call initialize() first.")
+        self.refresh()
+        return self.catalog_json, self.catalog_etag
+
+    @staticmethod
+    def _create_thumbnail(gradient) -> str:
+        """Generate a gradient's thumbnail, logging failures"""
+        try:
+            # Lossless WebP keeps the exact colours in fewer bytes than PNG,
+            # which shrinks the catalog that inlines every thumbnail
+            return create_thumbnail(gradient.path, size=(256, 10), output_format="WEBP")
+        except Exception as e:
+            logger.warning(f"Failed to create thumbnail for {gradient.name}: {e}")
+            return "data:image/webp;base64,"
 
     def get_catalog(self) -> GradientCatalog:
         """Get the gradient catalog
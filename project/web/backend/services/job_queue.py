@@ -1,64 +1,159 @@
 """Job queue manager for batch processing"""
 import asyncio
+import contextlib
 import logging
+import os
+import threading
+import time
 import uuid
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Callable, Dict, Optional
 from dataclasses import dataclass, field
 
 from lib.batch import BatchProcessor, ProcessingTask
-from ..models.schemas import JobRequest, JobStatus
+from lib.files import ImageFileIndex
+from ..models.schemas import PROGRESS_INTERVAL_MS, JobRequest, JobStatus
+from .messages import dumps_message
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between progress broadcasts for a job; ticks arriving
+# faster are coalesced into the latest one
+PROGRESS_INTERVAL = PROGRESS_INTERVAL_MS / 1000
 
-def _resolve_within(base: Path, relative_path: str) -> Path:
-    base_resolved = base.resolve()
-    candidate = (base / relative_path).resolve()
-    try:
-        candidate.relative_to(base_resolved)
-    except ValueError as exc:
-        raise ValueError(f"Invalid path: {relative_path}") from exc
-    return candidate
+# Jobs remembered for status and download; beyond this the oldest finished
+# jobs are forgotten (their output files stay on disk)
+MAX_JOBS = 10_000
+
+FINISHED_STATUSES = frozenset({"completed", "failed", "cancelled"})
 
 
 def _safe_output_name(name: str) -> str:
     return Path(name).name
 
 
-@dataclass
+@dataclass(slots=True)
 class Job:
     """Represents a batch processing job"""
     job_id: str
     tasks: list[ProcessingTask]
     status: str = "queued"  # queued, processing, completed, failed, cancelled
-    current: int = 0
     total: int = 0
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    completed_at: Optional[str] = None
+    # Unix timestamps; formatted only when a status is requested
+    created_at: float = field(default_factory=time.time)
+    completed_at: Optional[float] = None
     error_count: int = 0
     output_files: list[Path] = field(default_factory=list)
-    cancel_requested: bool = False
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    # Latest (current, message) tick, replaced as a whole so a reader on
+    # the event loop never sees the count of one tick with another's text
+    progress: tuple[int, str] = (0, "")
+    progress_event: Optional[asyncio.Event] = field(default=None, repr=False)
+    subscribers: list[Callable] = field(default_factory=list, repr=False)
+    # Pre-serialized message parts; only the fields that change per
+    # broadcast are encoded and spliced in
+    progress_prefix: str = field(init=False, repr=False)
+    error_prefix: str = field(init=False, repr=False)
+    complete_frame: str = field(init=False, repr=False)
+    cancelled_frame: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        job_id = dumps_message(self.job_id)
+        self.progress_prefix = f'{{"type":"progress","job_id":{job_id},"current":'
+        self.error_prefix = f'{{"type":"error","job_id":{job_id},"message":'
+        self.complete_frame = dumps_message({
+            "type": "complete",
+            "job_id": self.job_id,
+            "download_url": f"/api/jobs/{self.job_id}/download"
+        })
+        self.cancelled_frame = dumps_message({
+            "type": "cancelled",
+            "job_id": self.job_id,
+            "message": "Cancelled"
+        })
+
+    @property
+    def current(self) -> int:
+        return self.progress[0]
 
 
 class JobQueue:
     """Manages batch processing jobs with progress tracking"""
 
-    def __init__(self, input_folder: Path, gradient_folder: Path, output_folder: Path):
+    def __init__(
+        self,
+        input_folder: Path,
+        gradient_folder: Path,
+        output_folder: Path,
+        max_concurrent_jobs: Optional[int] = None
+    ):
         """Initialize job queue
 
         Args:
             input_folder: Path to input folder
             gradient_folder: Path to gradient folder
             output_folder: Path to output folder
+            max_concurrent_jobs: Number of jobs processed at once (default:
+                half the CPU count, at least 2); further jobs wait their turn
         """
         self.input_folder = input_folder
         self.gradient_folder = gradient_folder
         self.output_folder = output_folder
         self.jobs: Dict[str, Job] = {}
-        self.progress_callbacks: Dict[str, list[Callable]] = {}
         self._batch_processor = BatchProcessor()
+        self.max_concurrent_jobs = max_concurrent_jobs or max(2, (os.cpu_count() or 1) // 2)
+        # Each job thread mostly coordinates the shared worker pool, so a
+        # few are enough; asyncio's default executor would run up to
+        # cpu_count + 4 CPU-heavy batches at once
+        self._job_executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_jobs,
+            thread_name_prefix="jobq"
+        )
+        # Job IDs waiting for one of max_concurrent_jobs consumer tasks,
+        # which are started with the first job (a running loop is needed)
+        self._pending_jobs: asyncio.Queue = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._input_index = ImageFileIndex(input_folder)
+        self._gradient_index = ImageFileIndex(gradient_folder)
+
+    def close(self):
+        """Shut down the job threads and the batch processor's worker pool"""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers.clear()
+        self._job_executor.shutdown(wait=False, cancel_futures=True)
+        self._batch_processor.close()
+
+    def _resolve_task_paths(self, image_names: set, gradient_paths: set):
+        """Look up the distinct inputs and gradients of a job (blocking)
+
+        Paths come from the cached folder listings, which only hold files
+        inside the folders, so no per-name resolve is needed.
+
+        Returns:
+            tuple: ({image name: (path, stem)}, {gradient path: (path, stem)})
+
+        Raises:
+            ValueError: If an image or gradient does not exist
+        """
+        inputs = {}
+        for image_name in image_names:
+            input_path = self._input_index.lookup(image_name)
+            if input_path is None:
+                raise ValueError(f"Input image not found: {image_name}")
+            inputs[image_name] = (input_path, input_path.stem)
+
+        gradients = {}
+        for relative_path in gradient_paths:
+            gradient_path = self._gradient_index.lookup(relative_path)
+            if gradient_path is None:
+                raise ValueError(f"Gradient not found: {relative_path}")
+            gradients[relative_path] = (gradient_path, gradient_path.stem)
+
+        return inputs, gradients
 
     async def create_job(self, job_request: JobRequest) -> str:
         """Create a new batch processing job
@@ -69,7 +164,7 @@ class JobQueue:
         Returns:
             Job ID
         """
-        job_id = str(uuid.uuid4())
+        job_id = uuid.uuid4().hex
 
         # Ensure output folder exists
         self.output_folder.mkdir(parents=True, exist_ok=True)
@@ -78,31 +173,38 @@ class JobQueue:
         tasks = []
         output_files = []
 
-        for task_req in job_request.tasks:
-            # Build input path
-            input_path = _resolve_within(self.input_folder, task_req.image_name)
-            if not input_path.exists():
-                raise ValueError(f"Input image not found: {task_req.image_name}")
-
-            # Build gradient path (could be relative)
-            gradient_path = _resolve_within(self.gradient_folder, task_req.gradient_path)
-            if not gradient_path.exists():
-                raise ValueError(f"Gradient not found: {task_req.gradient_path}")
-
-            # Build output filename
-            base_name = Path(task_req.image_name).stem
-            gradient_name = Path(task_req.gradient_path).stem
-
-            if job_request.prefix:
-                output_name = f"{job_request.prefix}_{base_name}_{gradient_name}"
-            else:
-                output_name = f"{base_name}_{gradient_name}"
-
-            if job_request.suffix:
-                output_name = f"{output_name}_{job_request.suffix}"
+        # The prefix/suffix choice is the same for every task, so settle it
+        # once; concatenating (rather than str.format) keeps braces in a
+        # user-supplied prefix literal
+        name_head = f"{job_request.prefix}_" if job_request.prefix else ""
+        name_tail = f"_{job_request.suffix}" if job_request.suffix else ""
+        name_tail = f"{name_tail}.{job_request.output_format}"
+
+        # Jobs are usually a grid of a few images by many gradients, so
+        # each distinct name is looked up (and its stem taken) only once.
+        # A lookup may rescan a folder, so they all run on one worker thread
+        inputs, gradients = await asyncio.to_thread(
+            self._resolve_task_paths,
+            {task_req.image_name for task_req in job_request.tasks},
+            {task_req.gradient_path for task_req in job_request.tasks},
+        )
+        # Output names taken so far; names come from file stems only, so
+        # e.g. rgb.png and rgb.jpg, or two categories' Black.png, collide
+        used_names = set()
 
-            output_name = f"{output_name}.{job_request.output_format}"
-            output_name = _safe_output_name(output_name)
+        for task_req in job_request.tasks:
+            input_path, base_name = inputs[task_req.image_name]
+            gradient_path, gradient_name = gradients[task_req.gradient_path]
+
+            # Build output filename, numbering any that another task in
+            # this job already writes so no output overwrites another
+            output_stem = f"{name_head}{base_name}_{gradient_name}"
+            output_name = _safe_output_name(f"{output_stem}{name_tail}")
+            counter = 1
+            while output_name in used_names:
+                counter += 1
+                output_name = _safe_output_name(f"{output_stem}_{counter}{name_tail}")
+            used_names.add(output_name)
             output_path = self.output_folder / output_name
 
             # Create task
@@ -126,14 +228,38 @@ class JobQueue:
         )
 
         self.jobs[job_id] = job
+        self._evict_finished_jobs()
 
-        # Start processing in background
-        asyncio.create_task(self._process_job(job_id))
+        # Queue for processing in background
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.max_concurrent_jobs)
+            ]
+        self._pending_jobs.put_nowait(job_id)
 
         logger.info(f"Created job {job_id} with {len(tasks)} tasks")
 
         return job_id
 
+    async def _worker(self):
+        """Process queued jobs one at a time"""
+        while True:
+            job_id = await self._pending_jobs.get()
+            try:
+                await self._process_job(job_id)
+            finally:
+                self._pending_jobs.task_done()
+
+    def _evict_finished_jobs(self):
+        """Forget the oldest finished jobs once more than MAX_JOBS are kept"""
+        excess = len(self.jobs) - MAX_JOBS
+        if excess <= 0:
+            return
+        # Dicts keep insertion order, so this walks jobs oldest first
+        finished = (job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES)
+        for job_id in list(islice(finished, excess)):
+            del self.jobs[job_id]
+
     async def _process_job(self, job_id: str):
         """Process a job asynchronously
 
@@ -146,41 +272,56 @@ class JobQueue:
             return
 
         try:
-            if job.cancel_requested:
+            if job.cancel_event.is_set():
                 job.status = "cancelled"
-                job.completed_at = datetime.now().isoformat()
-                await self._broadcast_cancelled(job_id)
+                job.completed_at = time.time()
+                self._broadcast_cancelled(job)
                 return
 
             job.status = "processing"
-            await self._broadcast_progress(job_id, "Job started")
+            job.progress = (0, "Job started")
+            self._broadcast_progress(job, full=True)
 
             loop = asyncio.get_running_loop()
+            job.progress_event = asyncio.Event()
+            broadcaster = asyncio.create_task(self._progress_broadcaster(job))
 
-            def _schedule_progress(current, total, message):
-                job.current = current
-                asyncio.create_task(self._broadcast_progress(job_id, message))
+            # Progress callback for batch processor (runs in worker thread).
+            # Only swaps in the latest tick and wakes the broadcaster, so the
+            # loop receives a bare Event.set per tick and intermediate ticks
+            # are dropped under load.
+            progress_event = job.progress_event
 
-            # Progress callback for batch processor (runs in worker thread)
             def progress_callback(current, total, message):
-                loop.call_soon_threadsafe(_schedule_progress, current, total, message)
-
-            # Run batch processing in thread pool to avoid blocking
-            successful_count, failed_count, error_messages = await loop.run_in_executor(
-                None,
-                lambda: self._batch_processor.process_batch(
-                    job.tasks,
-                    progress_callback=progress_callback,
-                    use_parallel=True,
-                    cancel_check=lambda: job.cancel_requested
+                job.progress = (current, message)
+                loop.call_soon_threadsafe(progress_event.set)
+
+            try:
+                # Run batch processing in thread pool to avoid blocking
+                successful_count, failed_count, error_messages = await loop.run_in_executor(
+                    self._job_executor,
+                    lambda: self._batch_processor.process_batch(
+                        job.tasks,
+                        progress_callback=progress_callback,
+                        use_parallel=True,
+                        cancel_check=job.cancel_event.is_set
+                    )
                 )
-            )
+            finally:
+                broadcaster.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await broadcaster
+
+            # Flush a tick that arrived during the last interval
+            if job.progress_event.is_set():
+                job.progress_event.clear()
+                self._broadcast_progress(job)
 
             # Update job status
-            if job.cancel_requested:
+            if job.cancel_event.is_set():
                 job.status = "cancelled"
-                job.completed_at = datetime.now().isoformat()
-                await self._broadcast_cancelled(job_id)
+                job.completed_at = time.time()
+                self._broadcast_cancelled(job)
                 return
 
             job.error_count = failed_count
@@ -191,101 +332,118 @@ class JobQueue:
             else:
                 job.status = "completed"
 
-            job.completed_at = datetime.now().isoformat()
+            job.completed_at = time.time()
 
             # Broadcast completion
-            await self._broadcast_complete(job_id)
+            self._broadcast_complete(job)
 
             logger.info(f"Job {job_id} completed: {successful_count} success, {failed_count} failed")
 
         except Exception as e:
             logger.error(f"Job {job_id} failed with error: {e}")
             job.status = "failed"
-            job.completed_at = datetime.now().isoformat()
-            await self._broadcast_error(job_id, str(e))
+            job.completed_at = time.time()
+            self._broadcast_error(job, str(e))
 
-    async def _broadcast_progress(self, job_id: str, message: str):
-        """Broadcast progress update to all subscribers
+    async def _progress_broadcaster(self, job: Job):
+        """Broadcast a job's latest progress, at most once per PROGRESS_INTERVAL
 
         Args:
-            job_id: Job ID
-            message: Progress message
+            job: Job whose progress_event is set on each tick
         """
-        if job_id in self.progress_callbacks:
-            job = self.jobs.get(job_id)
-            if job:
-                if job.cancel_requested:
-                    return
-                for callback in self.progress_callbacks[job_id]:
-                    try:
-                        await callback({
-                            "type": "progress",
-                            "job_id": job_id,
-                            "current": job.current,
-                            "total": job.total,
-                            "status": job.status,
-                            "message": message
-                        })
-                    except Exception as e:
-                        logger.error(f"Error in progress callback: {e}")
-
-    async def _broadcast_complete(self, job_id: str):
+        while True:
+            await job.progress_event.wait()
+            job.progress_event.clear()
+            self._broadcast_progress(job)
+            await asyncio.sleep(PROGRESS_INTERVAL)
+
+    def _publish(self, job: Job, payload: str):
+        """Hand a serialized message to all subscribers of a job
+
+        Each subscriber is called without awaiting, so a slow client cannot
+        hold up the job.
+
+        Args:
+            job: Job whose subscribers receive the message
+            payload: JSON text of the message
+        """
+        for callback in list(job.subscribers):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"Error in progress callback: {e}")
+
+    def _progress_frame(self, job: Job, full: bool = False) -> str:
+        """Serialize a job's latest progress
+
+        Args:
+            job: Job
+            full: Include total and status, which only change on state
+                transitions; ticks otherwise carry just current and message
+
+        Returns:
+            str: JSON text of the progress message
+        """
+        current, message = job.progress
+        frame = f'{job.progress_prefix}{current},"message":{dumps_message(message)}'
+        if full:
+            frame += f',"total":{job.total},"status":{dumps_message(job.status)}'
+        return frame + "}"
+
+    def _broadcast_progress(self, job: Job, full: bool = False):
+        """Broadcast a job's latest progress to all subscribers
+
+        Args:
+            job: Job
+            full: Send the full state rather than a compact tick
+        """
+        if job.cancel_event.is_set() or not job.subscribers:
+            return
+        self._publish(job, self._progress_frame(job, full))
+
+    def _broadcast_complete(self, job: Job):
         """Broadcast job completion
 
         Args:
-            job_id: Job ID
+            job: Job
         """
-        if job_id in self.progress_callbacks:
-            for callback in self.progress_callbacks[job_id]:
-                try:
-                    await callback({
-                        "type": "complete",
-                        "job_id": job_id,
-                        "download_url": f"/api/jobs/{job_id}/download"
-                    })
-                except Exception as e:
-                    logger.error(f"Error in complete callback: {e}")
-
-    async def _broadcast_cancelled(self, job_id: str):
-        if job_id in self.progress_callbacks:
-            for callback in self.progress_callbacks[job_id]:
-                try:
-                    await callback({
-                        "type": "cancelled",
-                        "job_id": job_id,
-                        "message": "Cancelled"
-                    })
-                except Exception as e:
-                    logger.error(f"Error in cancelled callback: {e}")
-
-    async def _broadcast_error(self, job_id: str, error_message: str):
+        self._publish(job, job.complete_frame)
+
+    def _broadcast_cancelled(self, job: Job):
+        self._publish(job, job.cancelled_frame)
+
+    def _broadcast_error(self, job: Job, error_message: str):
         """Broadcast job error
 
         Args:
-            job_id: Job ID
+            job: Job
             error_message: Error message
         """
-        if job_id in self.progress_callbacks:
-            for callback in self.progress_callbacks[job_id]:
-                try:
-                    await callback({
-                        "type": "error",
-                        "job_id": job_id,
-                        "message": error_message
-                    })
-                except Exception as e:
-                    logger.error(f"Error in error callback: {e}")
-
-    def subscribe_progress(self, job_id: str, callback: Callable):
+        self._publish(job, f'{job.error_prefix}{dumps_message(error_message)}}}')
+
+    def subscribe_progress(self, job_id: str, callback: Callable) -> bool:
         """Subscribe to job progress updates
 
         Args:
             job_id: Job ID to subscribe to
-            callback: Async callback function
+            callback: Function called with each message as a JSON string
+
+        Returns:
+            True if subscribed, False if the job was not found
         """
-        if job_id not in self.progress_callbacks:
-            self.progress_callbacks[job_id] = []
-        self.progress_callbacks[job_id].append(callback)
+        job = self.jobs.get(job_id)
+        if not job:
+            return False
+        job.subscribers.append(callback)
+
+        # Later ticks are compact, so a subscriber joining mid-job gets the
+        # full state first
+        if job.status == "processing":
+            try:
+                callback(self._progress_frame(job, full=True))
+            except Exception as e:
+                logger.error(f"Error in progress callback: {e}")
+        return True
 
     def unsubscribe_progress(self, job_id: str, callback: Callable):
         """Unsubscribe from job progress updates
@@ -294,9 +452,10 @@ class JobQueue:
             job_id: Job ID
             callback: Callback to remove
         """
-        if job_id in self.progress_callbacks:
+        job = self.jobs.get(job_id)
+        if job:
             try:
-                self.progress_callbacks[job_id].remove(callback)
+                job.subscribers.remove(callback)
             except ValueError:
                 pass
 
@@ -322,8 +481,11 @@ class JobQueue:
             status=job.status,
             current=job.current,
             total=job.total,
-            created_at=job.created_at,
-            completed_at=job.completed_at,
+            created_at=datetime.fromtimestamp(job.created_at).isoformat(),
+            completed_at=(
+                datetime.fromtimestamp(job.completed_at).isoformat()
+                if job.completed_at is not None else None
+            ),
             download_url=download_url,
             error_count=job.error_count
         )
@@ -357,15 +519,15 @@ class JobQueue:
         if not job:
             return False
 
-        if job.status in ["completed", "failed", "cancelled"]:
+        if job.status in FINISHED_STATUSES:
             return False
 
-        job.cancel_requested = True
+        job.cancel_event.set()
         job.status = "cancelled"
-        job.completed_at = datetime.now().isoformat()
+        job.completed_at = time.time()
 
         logger.info(f"Job {job_id} cancelled")
 
-        await self._broadcast_cancelled(job_id)
+        self._broadcast_cancelled(job)
 
         return True
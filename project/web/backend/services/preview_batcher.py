@@ -0,0 +1,142 @@
+"""Preview batcher - coalesces concurrent previews of the same image"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from lib.preview import prepare_preview_base, render_preview_base64, render_preview_raw
+
+logger = logging.getLogger(__name__)
+
+
+class PreviewBatcher:
+    """Groups preview requests that share a base image and size
+
+    Requests arriving within `max_delay` seconds of the first one for the
+    same (image, max_dimension, raw) are rendered together in one worker
+    thread: the image is decoded and downscaled once, then only the
+    gradient mapping and encoding run per request. The grid view and
+    batch previews hit this constantly, with one image against many
+    gradients.
+
+    At most `max_concurrency` groups render at once, each holding one
+    decoded image; further groups wait up to `queue_timeout` seconds for
+    a slot and then fail with asyncio.TimeoutError. A burst of requests
+    therefore queues instead of decoding every image at the same time.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 16,
+        max_delay: float = 0.005,
+        max_concurrency: Optional[int] = None,
+        queue_timeout: float = 5.0,
+    ):
+        """Initialize preview batcher
+
+        Args:
+            max_batch_size: Requests per group before it is rendered early
+            max_delay: Seconds to wait for more requests after the first
+            max_concurrency: Groups rendered at once (default: CPU count,
+                at least 2)
+            queue_timeout: Seconds a group may wait for a render slot
+        """
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency or max(2, os.cpu_count() or 1)
+        self.queue_timeout = queue_timeout
+        self._pending: dict[tuple, list] = {}
+        self._running: set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def generate(self, image_path: Path, gradient_path: Path, max_dimension: int, raw: bool = False):
+        """Generate a preview, sharing the base image decode with concurrent requests
+
+        Args:
+            image_path: Path of the base image
+            gradient_path: Path of the gradient map
+            max_dimension: Maximum width or height of the preview
+            raw: Return the unencoded RGBA array instead of a base64 PNG
+
+        Returns:
+            str or np.ndarray: Data URI, or RGBA array when raw
+
+        Raises:
+            asyncio.TimeoutError: If no render slot freed up in time
+        """
+        loop = asyncio.get_running_loop()
+        key = (image_path, max_dimension, raw)
+        group = self._pending.get(key)
+        if group is None:
+            group = self._pending[key] = []
+            loop.call_later(self.max_delay, self._flush, key, group)
+
+        future = loop.create_future()
+        group.append((gradient_path, future))
+        if len(group) >= self.max_batch_size:
+            self._flush(key, group)
+        return await future
+
+    def _flush(self, key: tuple, group: list):
+        """Start rendering a group unless it has already been started"""
+        if self._pending.get(key) is not group:
+            return
+        del self._pending[key]
+        task = asyncio.create_task(self._run(key, group))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: tuple, group: list):
+        image_path, max_dimension, raw = key
+        gradient_paths = [gradient_path for gradient_path, _ in group]
+        if self._slots is None:
+            # Created lazily so it binds to the running loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError as e:
+            logger.warning(f"Preview queue full, rejecting {len(group)} preview(s)")
+            results = [e] * len(group)
+        else:
+            try:
+                results = await asyncio.to_thread(
+                    self._render_group, image_path, max_dimension, raw, gradient_paths
+                )
+            except Exception as e:
+                results = [e] * len(group)
+            finally:
+                self._slots.release()
+
+        for (_, future), result in zip(group, results):
+            if future.done():
+                # Client went away
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _render_group(image_path: Path, max_dimension: int, raw: bool, gradient_paths: list):
+        """Render previews of one base image (runs in a worker thread)
+
+        Returns:
+            list: Preview or exception per gradient, in order
+        """
+        try:
+            base_array = prepare_preview_base(image_path, max_dimension, raw=raw)
+        except Exception as e:
+            return [e] * len(gradient_paths)
+
+        render = render_preview_raw if raw else render_preview_base64
+        results = []
+        for gradient_path in gradient_paths:
+            try:
+                results.append(render(base_array, gradient_path))
+            except Exception as e:
+                results.append(e)
+        if len(gradient_paths) > 1:
+            logger.debug(f"Rendered {len(gradient_paths)} previews of {image_path.name} in one batch")
+        return results
@@ -0,0 +1,126 @@
+"""Static asset cache - serves frontend files from memory with ETags"""
+import hashlib
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Asset URLs carry no content hash (modules import each other by plain
+# relative path), so clients must revalidate; an unchanged asset then
+# costs a bodiless 304
+CACHE_CONTROL = "no-cache"
+
+
+@dataclass(slots=True)
+class StaticAsset:
+    """A frontend file held in memory"""
+    content: bytes
+    etag: str
+    media_type: str
+    mtime_ns: int
+    size: int
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class StaticAssetCache:
+    """Loads frontend files once and serves them with ETag revalidation"""
+
+    def __init__(self, root: Path):
+        """Initialize static asset cache
+
+        Args:
+            root: Directory of the frontend files
+        """
+        self.root = root.resolve()
+        self._assets: Dict[str, StaticAsset] = {}
+
+    def initialize(self):
+        """Read and hash every file under the root"""
+        self._assets.clear()
+        if not self.root.is_dir():
+            return
+        for path in self.root.rglob("*"):
+            if path.is_file():
+                self._load(path.relative_to(self.root).as_posix(), path)
+        logger.info(f"Cached {len(self._assets)} static assets from {self.root}")
+
+    def _load(self, key: str, path: Path) -> Optional[StaticAsset]:
+        try:
+            stat = path.stat()
+            content = path.read_bytes()
+        except OSError:
+            self._assets.pop(key, None)
+            return None
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        asset = StaticAsset(
+            content=content,
+            etag=f'"{hashlib.sha1(content).hexdigest()}"',
+            media_type=media_type,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+        )
+        self._assets[key] = asset
+        return asset
+
+    def get(self, relative_path: str) -> Optional[StaticAsset]:
+        """Get a cached asset, re-reading it if the file changed on disk
+
+        Args:
+            relative_path: Path relative to the root, using forward slashes
+
+        Returns:
+            StaticAsset or None if no such file exists under the root
+        """
+        key = os.path.normpath(relative_path).replace(os.sep, "/")
+        asset = self._assets.get(key)
+        if asset is None:
+            # Files added after startup; never look outside the root
+            path = (self.root / key).resolve()
+            if not path.is_relative_to(self.root) or not path.is_file():
+                return None
+            return self._load(key, path)
+
+        path = self.root / key
+        try:
+            stat = path.stat()
+        except OSError:
+            self._assets.pop(key, None)
+            return None
+        if stat.st_mtime_ns != asset.mtime_ns or stat.st_size != asset.size:
+            asset = self._load(key, path)
+        return asset
+
+    def response(self, request: Request, relative_path: str) -> Optional[Response]:
+        """Build the response for an asset
+
+        Args:
+            request: Incoming request, checked for If-None-Match
+            relative_path: Path relative to the root
+
+        Returns:
+            200 response with the content, 304 when the client's copy is
+            current, or None if the asset does not exist
+        """
+        asset = self.get(relative_path)
+        if asset is None:
+            return None
+
+        headers = {"ETag": asset.etag, "Cache-Control": CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, asset.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=asset.content, media_type=asset.media_type, headers=headers)
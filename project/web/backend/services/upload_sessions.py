@@ -0,0 +1,230 @@
+"""Resumable upload sessions - chunked uploads that survive dropped connections"""
+import errno
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+# Bytes per chunk: large enough that per-request overhead is negligible,
+# small enough that a dropped connection only costs a few seconds to resend
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Largest file accepted through a resumable upload
+MAX_UPLOAD_SIZE = 1024 * 1024 * 1024
+
+# Seconds a session may sit without receiving a chunk before it is dropped
+SESSION_TTL = 15 * 60
+
+# Sessions open at once, and bytes they may reserve on disk between them;
+# partial files are preallocated, so these bound the disk an anonymous
+# client can claim
+MAX_SESSIONS = 16
+MAX_RESERVED_BYTES = 4 * 1024 * 1024 * 1024
+
+# Partial files live in a hidden folder next to the input folder. Writing
+# them inside it would change directory mtimes, and with them the input
+# index generation, on every chunk.
+PARTIAL_FOLDER_NAME = ".uploads"
+
+
+class UploadCapacityError(Exception):
+    """Raised when a new upload would exceed the session or disk limits"""
+
+
+@dataclass(slots=True)
+class UploadSession:
+    """A file being uploaded in chunks"""
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    partial_path: Path
+    received: set[int] = field(default_factory=set)
+    updated_at: float = field(default_factory=time.monotonic)
+    finishing: bool = False
+
+    @property
+    def chunk_count(self) -> int:
+        return -(-self.size // self.chunk_size)
+
+    @property
+    def offset(self) -> int:
+        """Bytes received without gaps from the start of the file"""
+        index = 0
+        while index in self.received:
+            index += 1
+        return min(index * self.chunk_size, self.size)
+
+    @property
+    def complete(self) -> bool:
+        return len(self.received) == self.chunk_count
+
+
+class UploadManager:
+    """Tracks resumable uploads into an input folder
+
+    Chunks are written at their offset in a preallocated partial file, so
+    they may arrive in any order and in parallel; resending a chunk simply
+    overwrites it. Sessions are kept in memory only, capped in number and
+    reserved bytes, and dropped after SESSION_TTL seconds without a chunk.
+    """
+
+    def __init__(
+        self,
+        input_folder: Path,
+        partial_folder: Optional[Path] = None,
+        chunk_size: int = CHUNK_SIZE,
+        max_sessions: int = MAX_SESSIONS,
+        max_reserved_bytes: int = MAX_RESERVED_BYTES,
+    ):
+        """Initialize upload manager
+
+        Args:
+            input_folder: Folder completed uploads are moved into
+            partial_folder: Folder for partial files; must not be inside
+                input_folder (default: .uploads next to it)
+            chunk_size: Bytes per chunk
+            max_sessions: Uploads in progress at once
+            max_reserved_bytes: Total declared size of uploads in progress
+        """
+        self.input_folder = input_folder
+        self.partial_folder = partial_folder or input_folder.parent / PARTIAL_FOLDER_NAME
+        self.chunk_size = chunk_size
+        self.max_sessions = max_sessions
+        self.max_reserved_bytes = max_reserved_bytes
+        self.sessions: Dict[str, UploadSession] = {}
+
+        # Sessions do not survive a restart, so neither do their files
+        shutil.rmtree(self.partial_folder, ignore_errors=True)
+
+    def create(self, filename: str, size: int) -> UploadSession:
+        """Start an upload session
+
+        Args:
+            filename: Final filename in the input folder (already sanitized)
+            size: Total file size in bytes
+
+        Returns:
+            UploadSession
+
+        Raises:
+            ValueError: If the size is out of range
+            UploadCapacityError: If too many uploads are in progress or
+                they would reserve too much disk
+        """
+        if not 0 < size <= MAX_UPLOAD_SIZE:
+            raise ValueError(f"Upload size must be between 1 and {MAX_UPLOAD_SIZE} bytes")
+
+        self._evict_stale_sessions()
+        if len(self.sessions) >= self.max_sessions:
+            raise UploadCapacityError("Too many uploads in progress")
+        reserved = sum(session.size for session in self.sessions.values())
+        if reserved + size > self.max_reserved_bytes:
+            raise UploadCapacityError("Too much upload data in progress")
+
+        upload_id = uuid.uuid4().hex
+        self.partial_folder.mkdir(parents=True, exist_ok=True)
+        partial_path = self.partial_folder / upload_id
+        with open(partial_path, "wb") as f:
+            f.truncate(size)
+
+        session = UploadSession(
+            upload_id=upload_id,
+            filename=filename,
+            size=size,
+            chunk_size=self.chunk_size,
+            partial_path=partial_path,
+        )
+        self.sessions[upload_id] = session
+        logger.info(f"Started upload {upload_id} for {filename} ({size} bytes)")
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        """Get an upload session by ID, or None if unknown or expired"""
+        self._evict_stale_sessions()
+        return self.sessions.get(upload_id)
+
+    async def write_chunk(self, session: UploadSession, offset: int, data: AsyncIterator[bytes]):
+        """Write one chunk of an upload
+
+        Args:
+            session: Upload session
+            offset: Byte offset of the chunk; must fall on a chunk boundary
+            data: Chunk body
+
+        Raises:
+            ValueError: If the offset is not a chunk boundary or the body
+                does not match the chunk's length
+        """
+        if offset < 0 or offset >= session.size or offset % session.chunk_size:
+            raise ValueError(f"Offset {offset} is not a chunk boundary of this upload")
+
+        # A resent chunk overwrites the stored one, so it only counts as
+        # received again once it has been written in full
+        index = offset // session.chunk_size
+        session.received.discard(index)
+        session.updated_at = time.monotonic()
+
+        expected = min(session.chunk_size, session.size - offset)
+        written = 0
+        async with aiofiles.open(session.partial_path, "r+b") as f:
+            await f.seek(offset)
+            async for block in data:
+                written += len(block)
+                if written > expected:
+                    raise ValueError(f"Chunk at offset {offset} exceeds {expected} bytes")
+                await f.write(block)
+
+        if written != expected:
+            raise ValueError(f"Chunk at offset {offset} has {written} bytes, expected {expected}")
+
+        session.received.add(index)
+        session.updated_at = time.monotonic()
+
+    def finish(self, session: UploadSession) -> Path:
+        """Move a complete upload into the input folder
+
+        Args:
+            session: Upload session whose chunks have all been received
+
+        Returns:
+            Path of the file in the input folder
+        """
+        self.sessions.pop(session.upload_id, None)
+        file_path = self.input_folder / session.filename
+        try:
+            os.replace(session.partial_path, file_path)
+        except OSError as e:
+            # The input folder may be a mount on another filesystem
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(session.partial_path, file_path)
+        logger.info(f"Completed upload {session.upload_id}: {session.filename}")
+        return file_path
+
+    def discard(self, upload_id: str) -> bool:
+        """Abort an upload and delete its partial file
+
+        Returns:
+            bool: True if the session existed
+        """
+        session = self.sessions.pop(upload_id, None)
+        if session is None:
+            return False
+        session.partial_path.unlink(missing_ok=True)
+        return True
+
+    def _evict_stale_sessions(self):
+        cutoff = time.monotonic() - SESSION_TTL
+        for upload_id, session in list(self.sessions.items()):
+            if session.updated_at < cutoff and not session.finishing:
+                logger.info(f"Dropping stale upload {upload_id}")
+                self.discard(upload_id)
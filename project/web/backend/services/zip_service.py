@@ -1,63 +1,99 @@
 """ZIP file creation service"""
 import logging
-import tempfile
 import zipfile
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 
 logger = logging.getLogger(__name__)
 
+# Formats that are already entropy-coded; deflating them again costs CPU
+# for next to no size reduction
+COMPRESSED_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".webp"})
 
-class ZipService:
-    """Creates ZIP archives of processed images"""
+# Bytes read from each file per streamed write. Every chunk costs a
+# threadpool hop and an ASGI send; below ~256 KiB that overhead, not the
+# copy, caps download throughput
+STREAM_CHUNK_SIZE = 256 * 1024
 
-    @staticmethod
-    def create_archive(files: List[Path], archive_name: str = "output.zip") -> Path:
-        """Create a ZIP archive of files
 
-        Args:
-            files: List of file paths to include
-            archive_name: Name for the ZIP file
+def _compress_type(file_path: Path) -> int:
+    if file_path.suffix.lower() in COMPRESSED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
 
-        Returns:
-            Path to created ZIP file
 
-        Raises:
-            ValueError: If no files provided or files don't exist
-        """
-        if not files:
-            raise ValueError("No files provided for ZIP archive")
+def _existing_files(files: List[Path]) -> List[Path]:
+    if not files:
+        raise ValueError("No files provided for ZIP archive")
 
-        # Filter to only existing files
-        existing_files = [f for f in files if f.exists()]
+    # Filter to only existing files
+    existing_files = [f for f in files if f.exists()]
 
-        if not existing_files:
-            raise ValueError("None of the provided files exist")
+    if not existing_files:
+        raise ValueError("None of the provided files exist")
 
-        # Create temporary ZIP file
-        temp_dir = Path(tempfile.gettempdir())
-        zip_path = temp_dir / archive_name
+    return existing_files
 
-        # Create ZIP
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in existing_files:
-                # Add file with just the filename (no directory structure)
-                zipf.write(file_path, arcname=file_path.name)
 
-        logger.info(f"Created ZIP archive {zip_path} with {len(existing_files)} files")
+class _StreamBuffer:
+    """Write-only file object collecting ZipFile output between yields
+
+    It has no tell() or seek(), so ZipFile writes sizes in data
+    descriptors instead of seeking back to patch the local headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
 
-        return zip_path
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipService:
+    """Streams ZIP archives of processed images"""
 
     @staticmethod
-    def create_job_archive(job_id: str, output_files: List[Path]) -> Path:
-        """Create a ZIP archive for a job's output files
+    def stream_archive(files: List[Path]) -> Iterator[bytes]:
+        """Stream a ZIP archive of files without writing it to disk
+
+        Files are validated up front so errors surface before the response
+        starts; the archive itself is produced as the iterator is consumed.
 
         Args:
-            job_id: Job ID
-            output_files: List of output file paths
+            files: List of file paths to include
 
         Returns:
-            Path to created ZIP file
+            Iterator of ZIP archive chunks
+
+        Raises:
+            ValueError: If no files provided or files don't exist
         """
-        archive_name = f"gradient_mapper_{job_id[:8]}.zip"
-        return ZipService.create_archive(output_files, archive_name)
+        return ZipService._iter_archive(_existing_files(files))
+
+    @staticmethod
+    def _iter_archive(files: List[Path]) -> Iterator[bytes]:
+        buffer = _StreamBuffer()
+        with zipfile.ZipFile(buffer, 'w') as zipf:
+            for file_path in files:
+                # Add file with just the filename (no directory structure)
+                zinfo = zipfile.ZipInfo.from_file(file_path, arcname=file_path.name)
+                zinfo.compress_type = _compress_type(file_path)
+                with open(file_path, 'rb') as src, zipf.open(zinfo, 'w') as dest:
+                    while chunk := src.read(STREAM_CHUNK_SIZE):
+                        dest.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+
+        # Remaining entry data and the central directory
+        yield buffer.drain()
+        logger.info(f"Streamed ZIP archive with {len(files)} files")
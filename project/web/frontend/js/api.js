@@ -30,6 +30,75 @@ export const api = {
         return response.json();
     },
 
+    /**
+     * Upload one file in chunks that are retried individually
+     * @param {File} file - File to upload
+     * @param {number} parallel - Chunks in flight at once
+     * @param {number} retries - Attempts per chunk before giving up
+     * @returns {Promise<Object>} Uploaded image info
+     */
+    async uploadFileResumable(file, parallel = 4, retries = 3) {
+        const response = await fetch(`${baseUrl}/uploads`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Upload failed');
+        }
+
+        const { upload_id: uploadId, chunk_size: chunkSize } = await response.json();
+        const offsets = [];
+        for (let offset = 0; offset < file.size; offset += chunkSize) {
+            offsets.push(offset);
+        }
+
+        let uploaded = null;
+        const sendChunk = async (offset) => {
+            for (let attempt = 1; ; attempt++) {
+                try {
+                    const chunkResponse = await fetch(`${baseUrl}/uploads/${uploadId}?offset=${offset}`, {
+                        method: 'PATCH',
+                        headers: {
+                            'Content-Type': 'application/octet-stream'
+                        },
+                        body: file.slice(offset, offset + chunkSize)
+                    });
+                    if (!chunkResponse.ok) {
+                        const error = await chunkResponse.json();
+                        // Client errors will not fix themselves on retry
+                        if (chunkResponse.status < 500) {
+                            throw Object.assign(new Error(error.detail || 'Upload failed'), { fatal: true });
+                        }
+                        throw new Error(error.detail || 'Upload failed');
+                    }
+                    const result = await chunkResponse.json();
+                    if (result.complete) {
+                        uploaded = result.file;
+                    }
+                    return;
+                } catch (error) {
+                    if (error.fatal || attempt >= retries) throw error;
+                }
+            }
+        };
+
+        // Each worker takes the next unsent chunk until none are left
+        let next = 0;
+        const worker = async () => {
+            while (next < offsets.length) {
+                await sendChunk(offsets[next++]);
+            }
+        };
+        await Promise.all(Array.from({ length: Math.min(parallel, offsets.length) }, worker));
+
+        return uploaded;
+    },
+
     /**
      * Get list of uploaded images
      * @returns {Promise<Object>} List of images
@@ -86,6 +155,80 @@ export const api = {
         return response.json();
     },
 
+    /**
+     * Generate an unencoded RGBA preview of gradient-mapped image
+     * @param {string} imageName - Image filename
+     * @param {string} gradientPath - Gradient relative path
+     * @param {number} maxDimension - Max preview dimension
+     * @returns {Promise<Object>} Preview pixels as ImageData plus dimensions
+     */
+    async generatePreviewRaw(imageName, gradientPath, maxDimension = 400) {
+        const response = await fetch(`${baseUrl}/preview/raw`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                image_name: imageName,
+                gradient_path: gradientPath,
+                max_dimension: maxDimension
+            })
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Preview generation failed');
+        }
+
+        const [height, width] = response.headers.get('Content-Shape').split(',').map(Number);
+        const originalDimensions = response.headers.get('Original-Dimensions').split(',').map(Number);
+        const pixels = new Uint8ClampedArray(await response.arrayBuffer());
+
+        return {
+            image: new ImageData(pixels, width, height),
+            dimensions: [width, height],
+            original_dimensions: originalDimensions
+        };
+    },
+
+    /**
+     * Generate several unencoded RGBA previews in a single request
+     * @param {Array} requests - Array of {image_name, gradient_path, max_dimension} objects
+     * @returns {Promise<Array>} Raw previews in request order; null where a preview failed
+     */
+    async generatePreviewsRaw(requests) {
+        const response = await fetch(`${baseUrl}/preview/raw/batch`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ requests })
+        });
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Preview generation failed');
+        }
+
+        const shapes = response.headers.get('Content-Shapes').split(';');
+        const originals = response.headers.get('Original-Dimensions').split(';');
+        const buffer = await response.arrayBuffer();
+
+        let offset = 0;
+        return shapes.map((shape, index) => {
+            if (!shape) return null;
+            const [height, width, channels] = shape.split(',').map(Number);
+            const length = height * width * channels;
+            const pixels = new Uint8ClampedArray(buffer, offset, length);
+            offset += length;
+            return {
+                image: new ImageData(pixels, width, height),
+                dimensions: [width, height],
+                original_dimensions: originals[index].split(',').map(Number)
+            };
+        });
+    },
+
     /**
      * Create a batch processing job
      * @param {Array} tasks - Array of {image_name, gradient_path} objects
@@ -54,9 +54,31 @@ export class PreviewComponent {
         `;
 
         this.container.innerHTML = html;
+        this.paintPreviews();
         this.attachListeners();
     }
 
+    paintPreviews() {
+        if (this.previewData) {
+            this.container.querySelectorAll('[data-preview-canvas="true"]').forEach(canvas => {
+                this.drawImage(canvas, this.previewData.image);
+            });
+        }
+
+        this.container.querySelectorAll('[data-grid-canvas]').forEach(canvas => {
+            const item = this.gridPreviews[Number(canvas.dataset.gridCanvas)];
+            if (item) {
+                this.drawImage(canvas, item.preview.image);
+            }
+        });
+    }
+
+    drawImage(canvas, image) {
+        canvas.width = image.width;
+        canvas.height = image.height;
+        canvas.getContext('2d').putImageData(image, 0, 0);
+    }
+
     renderContent() {
         if (this.mode === 'grid') {
             return this.renderGrid();
@@ -110,9 +132,8 @@ export class PreviewComponent {
                         With Gradient
                     </div>
                     <div class="p-2 bg-white">
-                        <img src="${escapeHtml(this.previewData.preview_image)}"
-                            alt="Preview"
-                            class="w-full h-auto">
+                        <canvas data-preview-canvas="true"
+                            class="w-full h-auto"></canvas>
                     </div>
                 </div>
             </div>
@@ -131,9 +152,8 @@ export class PreviewComponent {
                 </div>
                 <div class="p-2 bg-white">
                     <div id="slider-container" class="preview-slider-container relative">
-                        <img src="${escapeHtml(this.previewData.preview_image)}"
-                            alt="Preview"
-                            class="w-full h-auto">
+                        <canvas data-preview-canvas="true"
+                            class="w-full h-auto"></canvas>
                         <img src="${escapeHtml(this.originalImageUrl)}"
                             alt="Original"
                             id="slider-original"
@@ -192,7 +212,7 @@ export class PreviewComponent {
 
         return `
             <div class="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4">
-                ${this.gridPreviews.map(item => {
+                ${this.gridPreviews.map((item, index) => {
                     const isSelected = this.currentGradient
                         && item.gradient.relative_path === this.currentGradient.path;
                     return `
@@ -205,9 +225,8 @@ export class PreviewComponent {
                                 ${escapeHtml(item.gradient.name)}
                             </div>
                             <div class="p-2 bg-white">
-                                <img src="${escapeHtml(item.preview.preview_image)}"
-                                    alt="${escapeHtml(item.gradient.name)}"
-                                    class="w-full h-auto">
+                                <canvas data-grid-canvas="${index}"
+                                    class="w-full h-auto"></canvas>
                             </div>
                         </button>
                     `;
@@ -366,7 +385,7 @@ export class PreviewComponent {
         try {
             this.originalImageUrl = `/api/images/${this.encodePath(imageName)}`;
 
-            const preview = await api.generatePreview(imageName, gradientData.path);
+            const preview = await api.generatePreviewRaw(imageName, gradientData.path);
 
             this.previewData = preview;
             this.isGenerating = false;
@@ -409,18 +428,20 @@ export class PreviewComponent {
                 return;
             }
 
-            const results = await Promise.allSettled(
-                gradients.map(gradient =>
-                    api.generatePreview(this.currentImage, gradient.relative_path, 300)
-                )
+            const previews = await api.generatePreviewsRaw(
+                gradients.map(gradient => ({
+                    image_name: this.currentImage,
+                    gradient_path: gradient.relative_path,
+                    max_dimension: 300
+                }))
             );
 
-            this.gridPreviews = results
-                .map((result, index) => {
-                    if (result.status !== 'fulfilled') return null;
+            this.gridPreviews = previews
+                .map((preview, index) => {
+                    if (!preview) return null;
                     return {
                         gradient: gradients[index],
-                        preview: result.value
+                        preview
                     };
                 })
                 .filter(Boolean);
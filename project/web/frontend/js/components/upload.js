@@ -5,6 +5,9 @@
 import { api } from '../api.js';
 import { escapeHtml } from '../utils/escape.js';
 
+// Files above this size are sent through the resumable chunked upload
+const RESUMABLE_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+
 export class UploadComponent {
     constructor(selector) {
         this.container = document.querySelector(selector);
@@ -84,9 +87,31 @@ export class UploadComponent {
         `;
 
         try {
-            const result = await api.uploadImages(files);
+            // Large files go up in resumable chunks, so a dropped
+            // connection only resends the chunk in flight; the server
+            // rejects any that are not supported images
+            const large = files.filter(file => file.size > RESUMABLE_UPLOAD_THRESHOLD);
+            const small = files.filter(file => file.size <= RESUMABLE_UPLOAD_THRESHOLD);
+
+            const uploaded = [];
+            const rejected = [];
+            if (small.length > 0) {
+                const result = await api.uploadImages(small);
+                uploaded.push(...result.files);
+            }
+            for (const file of large) {
+                try {
+                    uploaded.push(await api.uploadFileResumable(file));
+                } catch (error) {
+                    rejected.push(`${file.name} (${error.message})`);
+                }
+            }
 
-            this.files = result.files;
+            if (uploaded.length === 0 && rejected.length > 0) {
+                throw new Error(rejected.join(', '));
+            }
+
+            this.files = uploaded;
 
             this.render();
             this.renderFileList();
@@ -98,7 +123,14 @@ export class UploadComponent {
                 this.dispatchSelection();
             }
 
-            this.showMessage(`Successfully uploaded ${this.files.length} file(s)`, 'success');
+            if (rejected.length > 0) {
+                this.showMessage(
+                    `Uploaded ${this.files.length} file(s); failed: ${rejected.join(', ')}`,
+                    'error'
+                );
+            } else {
+                this.showMessage(`Successfully uploaded ${this.files.length} file(s)`, 'success');
+            }
 
         } catch (error) {
             this.render();